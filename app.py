@@ -2,67 +2,233 @@ import streamlit as st
 import streamlit.components.v1 as components
 import os
 from datetime import datetime
-from dateutil.relativedelta import relativedelta
-from dotenv import load_dotenv
-from src.tts_logic import elevenlabs_tts_bytes
 
 # --- PAGE CONFIG ---
 st.set_page_config(layout="wide", page_title="Apogee AI")
-load_dotenv()
+# .env is loaded by the src modules that need it (on first import), not on every rerun
+
+# --- FINGERPRINTS ---
+# xxh3 is much faster than md5/sha for hashing array bytes into cache keys
+try:
+    import xxhash
+    def fingerprint(data: bytes) -> str:
+        return xxhash.xxh3_64_hexdigest(data)
+except ImportError:
+    import hashlib
+    def fingerprint(data: bytes) -> str:
+        return hashlib.blake2b(data, digest_size=8).hexdigest()
 
 # --- CSS ---
+# Read once per (path, mtime); editing the file still picks up changes
+@st.cache_data(show_spinner=False)
+def _read_css(file_name, mtime):
+    with open(file_name, encoding="utf-8") as f:
+        return f.read()
+
 def load_css(file_name):
-    with open(file_name) as f:
-        st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+    css = _read_css(file_name, os.path.getmtime(file_name))
+    st.markdown(f'<style>{css}</style>', unsafe_allow_html=True)
 
 if os.path.exists("assets/styles.css"):
     load_css("assets/styles.css")
 
+# --- STATIC CONTROL SCAFFOLDING ---
+# Consecutive static headers/spacers are sent as one element per rerun, not several
+CONTROLS_HEADER = "### I!I Galaxy Controls\n\n<br>"
+GRAVITY_HEADER = "<br>\n\n**Gravity (Threshold): 0.40**"
+
+# --- LAZY MODULE LOADERS ---
+# Heavy modules (Gemini clients, pydeck, models) load once per process, on first use
+@st.cache_resource(show_spinner=False)
+def get_neutralizer():
+    from src.literacy_logic import get_article_text, neutralize_content, classify_political_leaning, format_analysis
+    return get_article_text, neutralize_content, classify_political_leaning, format_analysis
+
+@st.cache_resource(show_spinner=False)
+def get_ai_analyst():
+    from src.ai_logic import stream_moorcheh_and_gemini
+    return stream_moorcheh_and_gemini
+
+@st.cache_resource(show_spinner=False)
+def get_map_tools():
+    from src.map_logic import get_map_data, generate_3d_map
+    return get_map_data, generate_3d_map
+
 # --- DATA FUNCTIONS ---
 
+# Labels for the 0-12 "Months Back" slider, rebuilt hourly (so month rollovers show up)
+@st.cache_resource(ttl=3600, show_spinner=False)
+def month_labels():
+    from dateutil.relativedelta import relativedelta
+    now = datetime.now()
+    return [(now - relativedelta(months=i)).strftime("%B %Y") for i in range(13)]
+
+EMBED_STREAM_BATCH = 8
+
 # Keep this cached because inputs are simple strings/ints (fast to hash)
-@st.cache_data(show_spinner=False)
+# max_entries bounds how many topic/month results stay in memory
+@st.cache_data(show_spinner=False, max_entries=8)
 def load_and_process_data(topic, months_back, use_mock):
-    """Fetches articles and calculates vector similarity matrix."""
-    from src.data_pipeline import get_full_articles
-    from src.math_engine import vectorize_articles, calculate_similarity
+    """Fetches articles, calculates vector similarity matrix and precomputes node colors.
+    Also returns the embeddings matrix (row i = articles[i]) for the AI Analyst."""
+    from src.data_pipeline import stream_full_articles
+    from src.math_engine import vectorize_articles, calculate_similarity, warm_embedding_cache
+    from src.graph_logic import compute_node_colors, quantize_similarity
     
-    raw_articles = get_full_articles(topic=topic, limit=30, mock=use_mock, months_back=months_back)
+    # Embed in small batches as articles arrive, overlapping downloads with the model
+    scraped, pending = [], []
+    for index, art in stream_full_articles(topic=topic, limit=30, mock=use_mock, months_back=months_back):
+        scraped.append((index, art))
+        pending.append(art)
+        if len(pending) == EMBED_STREAM_BATCH:
+            warm_embedding_cache(pending)
+            print(f"🧮 Embedded {len(scraped)} articles so far...")
+            pending = []
+    raw_articles = [art for _, art in sorted(scraped, key=lambda item: item[0])]
     
     if raw_articles:
         articles, vectors = vectorize_articles(raw_articles)
-        matrix = calculate_similarity(vectors)
-        return articles, matrix
-    return None, None
-
-# REMOVED @st.cache_data here to prevent "Hashing Slowdown" on large datasets
-def generate_graph_html(articles, matrix, threshold, color_mode):
-    """Generates the PyVis graph HTML string."""
-    from src.graph_logic import build_network_graph, save_graph_html
+        # int8 (similarity * 100) is plenty for 0.05-step thresholds and is
+        # a quarter of what session_state / the cache would hold as float32
+        matrix = quantize_similarity(calculate_similarity(vectors))
+        # Politics colors are computed once here (Sentiment on first use), not on every re-render
+        node_colors = compute_node_colors(articles)
+        return articles, matrix, node_colors, vectors
+    return None, None, None, None
+
+def graph_fingerprint(articles, matrix):
+    # Cheap fingerprint instead of hashing the full articles/matrix ("Hashing Slowdown")
+    urls = "|".join(art['url'] for art in articles).encode("utf-8")
+    return fingerprint(urls + matrix.tobytes())
+
+def generate_graph_html(articles, matrix, threshold, color_mode, node_colors=None):
+    """
+    Generates the PyVis graph HTML string (cached per data/threshold/mode in graph_logic).
+    Also stores the galaxy's {title: cluster} map in session_state for the AI Analyst.
+    """
+    from src.graph_logic import register_graph_inputs, cached_graph_html, cluster_title_groups
     
-    G = build_network_graph(articles, matrix, threshold=threshold, color_mode=color_mode)
-    html_file = save_graph_html(G, "galaxy.html")
+    if matrix is None:
+        return None
     
-    if html_file:
-        with open(html_file, 'r', encoding='utf-8') as f:
-            return f.read()
-    return None
+    key = graph_fingerprint(articles, matrix)
+    threshold_milli = int(round(threshold * 1000))
+    try:
+        # The input registry is shared by all sessions: if theirs pushed ours out
+        # before the render read it (KeyError), register once more and retry
+        for attempt in range(2):
+            register_graph_inputs(key, articles, matrix, node_colors)
+            try:
+                html = cached_graph_html(key, threshold_milli, color_mode)
+                st.session_state['title_to_group'] = cluster_title_groups(key, threshold_milli)
+                return html
+            except KeyError:
+                if attempt:
+                    raise
+    except Exception as e:
+        print(f"❌ Error rendering graph: {e}")
+        return None
+
+# Map data is a pure function of the articles, so key it on their URLs
+@st.cache_data(show_spinner=False, ttl=1800)
+def cached_map_data(url_key, _articles):
+    get_map_data, _ = get_map_tools()
+    return get_map_data(_articles)
+
+# Deck objects are reused as-is (cache_resource skips pickling them)
+@st.cache_resource(show_spinner=False, ttl=1800)
+def cached_3d_map(url_key, _map_df):
+    _, generate_3d_map = get_map_tools()
+    return generate_3d_map(_map_df)
 
 # ==========================================
 # 2. TTS FUNCTION (Lazy Load)
 # ==========================================
-@st.cache_data(show_spinner=False)
-def cached_tts(text: str, voice_id: str) -> bytes:
+TTS_CACHE_DIR = ".tts_cache"
+TTS_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+def _evict_tts_cache():
+    """Drops the oldest clips once the cache folder grows past the size cap."""
+    # Finished clips only: .part files are still being written by another session
+    clips = sorted(
+        (os.path.join(TTS_CACHE_DIR, f) for f in os.listdir(TTS_CACHE_DIR) if f.endswith(".mp3")),
+        key=os.path.getmtime
+    )
+    total = sum(os.path.getsize(c) for c in clips)
+    while clips and total > TTS_CACHE_MAX_BYTES:
+        oldest = clips.pop(0)
+        total -= os.path.getsize(oldest)
+        os.remove(oldest)
+
+def tts_cache_path(text: str, voice_id: str) -> str:
+    import hashlib
+    key = hashlib.sha256(f"{voice_id}|{text}".encode("utf-8")).hexdigest()
+    return os.path.join(TTS_CACHE_DIR, f"{key}.mp3")
+
+def synthesize_tts(text: str, voice_id: str):
+    """
+    Returns something st.audio can play: the cached .mp3 path (or raw bytes if
+    it couldn't be saved). Makes no st.* calls, so it can run on a worker thread.
+    """
+    # Persistent cache: same (voice, text) replays the saved mp3 across sessions/restarts
+    path = tts_cache_path(text, voice_id)
+    if os.path.exists(path):
+        return path
+
+    # Lazy import: Only loads the heavy ElevenLabs library when button is clicked
+    from src.tts_logic import elevenlabs_tts_stream
+    
+    # Call the function from your external file
+    # Chunks go straight to disk as they arrive (temp file, renamed once complete)
+    chunks = elevenlabs_tts_stream(text, voice_id=voice_id)
+
+    import tempfile
+    audio = bytearray()  # Everything received so far, in case the disk write fails
+    tmp_path = None
     try:
-        # Lazy import: Only loads the heavy ElevenLabs library when button is clicked
-        from src.tts_logic import elevenlabs_tts_bytes
-        
-        # Call the function from your external file
-        audio_data = elevenlabs_tts_bytes(text, voice_id=voice_id)
-        return audio_data
-    except Exception as e:
-        st.error(f"TTS Error: {e}")
-        return b""
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        # Unique temp name per writer: two sessions making the same clip never share a file
+        fd, tmp_path = tempfile.mkstemp(dir=TTS_CACHE_DIR, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                audio += chunk
+                f.write(chunk)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"⚠️ Could not cache TTS audio: {e}")
+        # Play it from memory: keep what arrived and read the rest of the same
+        # stream (a second synthesis would be billed again)
+        for chunk in chunks:
+            audio += chunk
+        return bytes(audio)
+    finally:
+        # Any failure before the rename (disk or API) leaves no half-written clip behind
+        if tmp_path and os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    try:
+        _evict_tts_cache()
+    except OSError as e:
+        print(f"⚠️ Could not trim TTS cache: {e}")
+    return path
+
+@st.cache_resource
+def get_tts_pool():
+    # Shared worker pool: TTS requests run in the background instead of blocking the script
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(max_workers=4)
+
+@st.fragment(run_every=0.5)
+def tts_progress():
+    # Only this placeholder reruns while the clip is generated; once it's ready,
+    # one full rerun collects it above and the fragment is no longer rendered
+    tts_future = st.session_state.get("tts_future")
+    if tts_future is None or tts_future.done():
+        st.rerun()
+    st.caption("🔊 Generating audio...")
 
 # ==========================================
 # 1. SIDEBAR
@@ -100,8 +266,7 @@ if selected_page == "Galaxy Graph":
     # --- CONTROLS ---
     with col_controls:
         with st.container(border=True):
-            st.subheader("I!I Galaxy Controls")
-            st.markdown("<br>", unsafe_allow_html=True)
+            st.markdown(CONTROLS_HEADER, unsafe_allow_html=True)
             
             topic = st.text_input("Search Topic", "Artificial Intelligence")
             
@@ -118,15 +283,13 @@ if selected_page == "Galaxy Graph":
             )
             # --------------------------
 
-            label_month = (datetime.now() - relativedelta(months=months_back)).strftime("%B %Y")
+            label_month = month_labels()[months_back]
             st.caption(f"📅 {label_month}")
             st.markdown("---")
             
             mode = st.radio("Source", ["Mock Data", "Live API"], horizontal=True, label_visibility="collapsed")
             use_mock = (mode == "Mock Data")
-            st.markdown("<br>", unsafe_allow_html=True)
-            
-            st.markdown("**Gravity (Threshold): 0.40**")
+            st.markdown(GRAVITY_HEADER, unsafe_allow_html=True)
             threshold = st.slider("Gravity", 0.0, 1.0, 0.4, 0.05, label_visibility="collapsed")
             st.markdown("<br>", unsafe_allow_html=True)
 
@@ -145,18 +308,27 @@ if selected_page == "Galaxy Graph":
                 with st.spinner(f"Scanning for '{topic}'..."):
                     
                     # 'months_back' is now guaranteed to be 0
-                    articles, matrix = load_and_process_data(topic, months_back, use_mock)
-        
-                    # CLEAR old state first to prevent ghost data
-                    st.session_state['last_graph_params'] = None 
+                    articles, matrix, node_colors, vectors = load_and_process_data(topic, months_back, use_mock)
         
                 if articles:
+                    from src.math_engine import normalize_vectors
+                    from src.chatbot import quantize_article_matrix, build_ann_index
                     st.session_state['articles'] = articles
                     st.session_state['matrix'] = matrix
+                    st.session_state['node_colors'] = node_colors
+                    # Unit-length int8 article vectors for the AI Analyst (built once per galaxy)
+                    unit_vectors = normalize_vectors(vectors)
+                    st.session_state['article_matrix'] = quantize_article_matrix(unit_vectors)
+                    # None for small galaxies (or without hnswlib): the full scan is used instead
+                    st.session_state['ann_index'] = build_ann_index(unit_vectors)
                     st.success(f"Found {len(articles)} stars from {label_month}!")
                 else:
                     st.session_state['articles'] = []
                     st.session_state['matrix'] = None
+                    st.session_state['node_colors'] = None
+                    st.session_state['article_matrix'] = None
+                    st.session_state['ann_index'] = None
+                    st.session_state['title_to_group'] = None
                     st.error(f"No articles found for {label_month}.")
 
     # --- DISPLAY ---
@@ -165,33 +337,22 @@ if selected_page == "Galaxy Graph":
         st.caption("SEMANTIC ARTICLE TOPOLOGY")
         
         if 'articles' in st.session_state:
-            # PERFORMANCE FIX: Manual State Management
-            # We create a "signature" of the current settings
-            current_params = (
-            threshold, 
-            selected_mode, 
-            len(st.session_state['articles']), 
-            months_back  # <--- ADD THIS
-            )
-            
-            # If settings changed (or graph doesn't exist), regenerate HTML
-            if ('last_graph_params' not in st.session_state) or (st.session_state['last_graph_params'] != current_params):
-                
-                # Only show spinner if we are actually doing work
-                with st.spinner("Aligning stars..."):
-                    html_content = generate_graph_html(
-                        st.session_state['articles'], 
-                        st.session_state['matrix'], 
-                        threshold, 
-                        selected_mode
-                    )
-                    st.session_state['graph_html'] = html_content
-                    st.session_state['last_graph_params'] = current_params
+            # PERFORMANCE FIX: every (data, threshold, mode) combination is cached,
+            # so revisiting an earlier slider position is a dictionary lookup
+            # (the HTML is not copied into session_state: the shared cache already holds it)
+            with st.spinner("Aligning stars..."):
+                graph_html = generate_graph_html(
+                    st.session_state['articles'], 
+                    st.session_state['matrix'], 
+                    threshold, 
+                    selected_mode,
+                    node_colors=st.session_state.get('node_colors')
+                )
             
-            # Render the stored HTML (Instant)
+            # Render the cached HTML (Instant)
             with st.container(border=True):
-                if st.session_state.get('graph_html'):
-                    components.html(st.session_state['graph_html'], height=600)
+                if graph_html:
+                    components.html(graph_html, height=600, scrolling=False)
         
         else:
             with st.container(border=True):
@@ -214,10 +375,15 @@ if selected_page == "Galaxy Graph":
             if st.button("Analyze", key="ai_analyze"):
                 if user_query.strip():
                     with st.spinner("Analyzing..."):
-                        from src.ai_logic import query_moorcheh_and_gemini
-                        response = query_moorcheh_and_gemini(user_query)
+                        stream_moorcheh_and_gemini = get_ai_analyst()
+                        # Show tokens as they arrive; the finished text is rendered below as usual
+                        live = st.empty()
+                        with live.container(border=True):
+                            response = st.write_stream(stream_moorcheh_and_gemini(user_query))
+                        live.empty()
                         st.session_state["last_ai_response"] = response
                         st.session_state["last_ai_audio"] = None 
+                        st.session_state["tts_future"] = None
                 else:
                     st.warning("Please type a question first.")
 
@@ -228,10 +394,23 @@ if selected_page == "Galaxy Graph":
                     st.markdown("---")
                     if st.button("▶️ Read Aloud"):
                         script = f"Summary: {st.session_state['last_ai_response'][:200]}..."
-                        st.session_state["last_ai_audio"] = cached_tts(script, "JBFqnCBsd6RMkjVDRZzb")
+                        # Runs in the background; the page stays interactive meanwhile
+                        st.session_state["tts_future"] = get_tts_pool().submit(synthesize_tts, script, "JBFqnCBsd6RMkjVDRZzb")
+                        st.session_state["last_ai_audio"] = None
+                    
+                    # Collect the finished clip (session_state keeps the file path, not mp3 bytes)
+                    tts_future = st.session_state.get("tts_future")
+                    if tts_future is not None and tts_future.done():
+                        st.session_state["tts_future"] = None
+                        try:
+                            st.session_state["last_ai_audio"] = tts_future.result()
+                        except Exception as e:
+                            st.error(f"TTS Error: {e}")
                     
                     if st.session_state.get("last_ai_audio"):
                         st.audio(st.session_state["last_ai_audio"], format="audio/mpeg")
+                    elif st.session_state.get("tts_future") is not None:
+                        tts_progress()
         else:
             st.info("Launch the Galaxy to enable AI Analyst.")
 
@@ -241,10 +420,10 @@ if selected_page == "Galaxy Graph":
 elif selected_page == "Global Map":
     st.header("🌍 Global Map")
     if 'articles' in st.session_state:
-        from src.map_logic import get_map_data, generate_3d_map
-        map_df = get_map_data(st.session_state['articles'])
+        url_key = tuple(art['url'] for art in st.session_state['articles'])
+        map_df = cached_map_data(url_key, st.session_state['articles'])
         if not map_df.empty:
-            st.pydeck_chart(generate_3d_map(map_df))
+            st.pydeck_chart(cached_3d_map(url_key, map_df))
             st.caption(f"Mapped {len(map_df)} articles.")
         else:
             st.warning("No location keywords found.")
@@ -265,10 +444,16 @@ elif selected_page == "Bias Neutralizer":
         if st.button("Neutralize Article ✨", type="primary"):
             if user_content:
                 with st.spinner("Removing bias..."):
-                    from src.literacy_logic import neutralize_content, classify_political_leaning, format_analysis
+                    from concurrent.futures import ThreadPoolExecutor
+                    get_article_text, neutralize_content, classify_political_leaning, format_analysis = get_neutralizer()
                     is_url = (input_method == "Paste URL")
-                    title, orig, neut = neutralize_content(user_content, is_url=is_url)
-                    leaning = classify_political_leaning(user_content, is_url=is_url)
+                    # Scrape once, then run both Gemini calls side by side
+                    scraped = get_article_text(user_content) if is_url else None
+                    with ThreadPoolExecutor(max_workers=2) as executor:
+                        neut_future = executor.submit(neutralize_content, user_content, is_url=is_url, scraped=scraped)
+                        leaning_future = executor.submit(classify_political_leaning, user_content, is_url=is_url, scraped=scraped)
+                        title, orig, neut = neut_future.result()
+                        leaning = leaning_future.result()
                     st.session_state['neut_results'] = {
                         'title': title, 'orig': orig, 'neut': neut, 'analysis': format_analysis(leaning)
                     }
@@ -4,32 +4,51 @@ from src.chatbot import chat_with_constellation
 
 def query_moorcheh_and_gemini(user_question, chat_history=None):
     """
-    Query the chatbot using articles and graph data from session state.
+    Query the chatbot using the articles and cluster map in session state.
     Uses the vector embeddings from math_engine to find relevant articles through semantic search,
     then queries Gemini API to generate responses with direct quotes from the articles.
+    Returns the whole answer as one string (see stream_moorcheh_and_gemini).
     
     Parameters:
     - user_question (str): The user's question
     - chat_history (list, optional): Previous conversation messages for context
     """
-    # Get articles and graph from session state (populated by app.py)
+    return "".join(stream_moorcheh_and_gemini(user_question, chat_history))
+
+def stream_moorcheh_and_gemini(user_question, chat_history=None):
+    """
+    Yields the answer in chunks as Gemini writes it (for st.write_stream), so the
+    first words show up right away.
+    """
+    # Get articles and their cluster map from session state (populated by app.py)
     articles = st.session_state.get('articles', [])
-    graph = st.session_state.get('graph', None)
     
     if not articles:
-        return "⚠️ No articles available. Please generate a galaxy first by clicking '🚀 Launch Galaxy'."
+        yield "⚠️ No articles available. Please generate a galaxy first by clicking '🚀 Launch Galaxy'."
+        return
     
-    # Use the chatbot to get response
-    # Use Gemini to get responses with direct quotes from articles
+    moorcheh_namespace = None  # Optional: specify Moorcheh namespace if using remote vectors
+
+    # Repeated questions are answered from chatbot's semantic cache (successful answers only)
     result = chat_with_constellation(
         user_query=user_question,
         articles=articles,
-        graph=graph,
-        chat_history=chat_history,  # Pass conversation history for context
+        chat_history=chat_history,
         top_k=5,
         similarity_threshold=0.3,
-        use_gemini=True,  # Use Gemini to get direct quotes from articles
-        moorcheh_namespace=None  # Optional: specify Moorcheh namespace if using remote vectors
+        use_gemini=True,
+        moorcheh_namespace=moorcheh_namespace,
+        article_matrix=st.session_state.get('article_matrix'),
+        ann_index=st.session_state.get('ann_index'),
+        title_to_group=st.session_state.get('title_to_group'),
+        stream=True
     )
     
-    return result.get('response', 'No response generated.')
\ No newline at end of file
+    response = result.get('response', 'No response generated.')
+    if isinstance(response, str):
+        yield response
+        return
+    try:
+        yield from response
+    except Exception as e:
+        yield f"\n\n❌ Error while streaming the answer: {e}"
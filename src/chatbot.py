@@ -3,24 +3,44 @@ Chatbot module for News Constellation.
 Uses vector embeddings from articles to provide intelligent responses via RAG.
 """
 import os
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from functools import lru_cache
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
 import dotenv
 
+# Optional: HNSW index for large galaxies (brute force is faster for small ones)
+try:
+    import hnswlib
+    _HAS_HNSWLIB = True
+except ImportError:
+    _HAS_HNSWLIB = False
+from src.semantic_cache import SemanticCache
+from src.math_engine import get_embedder, embed_batch
+
 # Load environment variables
 dotenv.load_dotenv()
 
 # Reuse the same model from math_engine for consistency
 # This ensures query vectors are in the same embedding space as article vectors
-print("🤖 Loading Chatbot Model... (Reusing same embedding model)")
-_model = SentenceTransformer('all-MiniLM-L6-v2')
+# (get_embedder is st.cache_resource, so there is one copy per process, loaded on first query)
+def get_model():
+    return get_embedder()
 
 # API Keys
 MOORCHEH_API_KEY = os.getenv("MOORCHEH_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
 
+@lru_cache(maxsize=1024)
+def _encode_query(query):
+    # Repeated questions (reruns, re-sends) skip the model forward pass.
+    # Kept in memory only: ad-hoc questions don't belong in the persistent article cache
+    return embed_batch([query])[0]
+
+
 def vectorize_query(query):
     """
     Convert a text query to a vector using the same model as articles.
@@ -35,19 +55,72 @@ def vectorize_query(query):
         raise ValueError("Query cannot be empty")
     
     # Use the same model and encoding approach as articles
-    query_vector = _model.encode([query])[0]
+    # (copy so callers can't mutate the cached vector)
+    query_vector = _encode_query(query.strip()).copy()
     return query_vector
 
 
-def find_similar_articles(query_vector, articles, top_k=5, similarity_threshold=0.3):
+def build_article_matrix(articles):
+    """
+    Stacks article vectors into one contiguous float32 matrix with unit-length rows.
+    Built once per galaxy so each query is a single matrix-vector product.
+    
+    Parameters:
+    - articles (List[Dict]): List of articles, each must have a 'vector' key
+    
+    Returns:
+    - np.ndarray (N x D), row i belongs to articles[i]
+    """
+    A = np.ascontiguousarray([art['vector'] for art in articles], dtype=np.float32)
+    A /= np.linalg.norm(A, axis=1, keepdims=True) + 1e-12
+    return A
+
+
+# Unit vectors stored as int8 (value * 127): a quarter of the float32 memory traffic per scan
+VECTOR_SCALE = 127
+
+
+def quantize_article_matrix(article_matrix):
+    """
+    Converts a pre-normalized float32 article matrix to int8 for cheaper scans.
+    Top-k recall at the 0.3 threshold is unaffected at this precision.
+    """
+    q = np.round(np.asarray(article_matrix, dtype=np.float32) * VECTOR_SCALE)
+    return q.clip(-VECTOR_SCALE, VECTOR_SCALE).astype(np.int8)
+
+
+# Below this many articles a full scan beats the index
+ANN_MIN_ARTICLES = 200
+
+
+def build_ann_index(article_matrix):
+    """
+    Builds an HNSW index over pre-normalized article vectors.
+    Returns None when hnswlib is missing or the galaxy is small enough to brute-force.
+    """
+    if not _HAS_HNSWLIB or article_matrix is None or article_matrix.shape[0] < ANN_MIN_ARTICLES:
+        return None
+    n, dim = article_matrix.shape
+    index = hnswlib.Index(space='cosine', dim=dim)
+    index.init_index(max_elements=n, ef_construction=200, M=16)
+    index.add_items(np.asarray(article_matrix, dtype=np.float32), np.arange(n))
+    return index
+
+
+def find_similar_articles(query_vector, articles, top_k=5, similarity_threshold=0.3, article_matrix=None,
+                          ann_index=None):
     """
     Find articles similar to a query vector using cosine similarity.
     
     Parameters:
     - query_vector (np.ndarray): Vector representation of the query
-    - articles (List[Dict]): List of articles, each must have a 'vector' key
+    - articles (List[Dict]): List of articles; each needs a 'vector' key unless
+      article_matrix is given
     - top_k (int): Number of results to return
     - similarity_threshold (float): Minimum similarity score (0-1)
+    - article_matrix (np.ndarray, optional): Pre-normalized vectors from build_article_matrix(articles),
+      optionally int8 from quantize_article_matrix
+    - ann_index (hnswlib.Index, optional): Index from build_ann_index(...) over the same articles
     
     Returns:
     - List of (article_dict, similarity_score) tuples, sorted by similarity (highest first)
@@ -55,30 +128,59 @@ def find_similar_articles(query_vector, articles, top_k=5, similarity_threshold=
     if not articles:
         return []
     
-    # Check that articles have vectors
-    articles_with_vectors = [art for art in articles if 'vector' in art and art['vector'] is not None]
-    if not articles_with_vectors:
-        return []
-    
-    # Extract vectors as numpy array
-    article_vectors = np.array([art['vector'] for art in articles_with_vectors])
+    if ann_index is not None and ann_index.get_current_count() == len(articles):
+        # Over-fetch so the threshold filter still leaves top_k candidates
+        k = min(top_k * 2, len(articles))
+        labels, distances = ann_index.knn_query(np.asarray(query_vector, dtype=np.float32), k=k)
+        results = [
+            (articles[int(i)], float(1.0 - d))
+            for i, d in zip(labels[0], distances[0])
+            if 1.0 - d >= similarity_threshold
+        ]
+        return results[:top_k]
     
-    # Reshape query_vector to 2D for cosine_similarity
-    query_vector_2d = query_vector.reshape(1, -1)
+    if article_matrix is None or article_matrix.shape[0] != len(articles):
+        # Check that articles have vectors
+        articles = [art for art in articles if 'vector' in art and art['vector'] is not None]
+        if not articles:
+            return []
+        article_matrix = build_article_matrix(articles)
     
-    # Calculate cosine similarity
-    similarities = cosine_similarity(query_vector_2d, article_vectors)[0]
+    # Rows are already unit length, so cosine similarity is one BLAS matvec
+    q = np.asarray(query_vector, dtype=np.float32).ravel()
+    q = q / (np.linalg.norm(q) + 1e-12)
+    if article_matrix.dtype == np.int8:
+        # Integer dot products (int32 accumulator), rescaled back to cosine
+        q_q = np.round(q * VECTOR_SCALE).astype(np.int8)
+        similarities = np.einsum('ij,j->i', article_matrix, q_q, dtype=np.int32).astype(np.float32)
+        similarities /= VECTOR_SCALE * VECTOR_SCALE
+    else:
+        similarities = article_matrix @ q
     
-    # Create tuples of (article, similarity_score)
-    results = [
-        (articles_with_vectors[i], float(similarities[i]))
-        for i in range(len(articles_with_vectors))
-        if similarities[i] >= similarity_threshold
-    ]
+    # Top-k without sorting every score
+    if similarities.size > top_k:
+        idx = np.argpartition(-similarities, top_k)[:top_k]
+    else:
+        idx = np.arange(similarities.size)
+    idx = idx[np.argsort(-similarities[idx])]
+    idx = idx[similarities[idx] >= similarity_threshold]
     
-    # Sort by similarity (highest first) and return top_k
-    results.sort(key=lambda x: x[1], reverse=True)
-    return results[:top_k]
+    return [(articles[i], float(similarities[i])) for i in idx.tolist()]
+
+
+@lru_cache(maxsize=1)
+def _get_moorcheh_client():
+    # One client (and its HTTP connections) for the whole process
+    # Try different import patterns for Moorcheh SDK
+    try:
+        from moorcheh_sdk import MoorchehClient
+        return MoorchehClient(api_key=MOORCHEH_API_KEY)
+    except ImportError:
+        try:
+            from moorcheh.client import Moorcheh
+            return Moorcheh(api_key=MOORCHEH_API_KEY)
+        except ImportError:
+            raise ImportError("moorcheh-sdk not installed. Run: pip install moorcheh-sdk")
 
 
 def _query_moorcheh_api(query, context_text, namespace=None):
@@ -94,16 +196,7 @@ def _query_moorcheh_api(query, context_text, namespace=None):
     - str: Generated response
     """
     try:
-        # Try different import patterns for Moorcheh SDK
-        try:
-            from moorcheh_sdk import MoorchehClient
-            client = MoorchehClient(api_key=MOORCHEH_API_KEY)
-        except ImportError:
-            try:
-                from moorcheh.client import Moorcheh
-                client = Moorcheh(api_key=MOORCHEH_API_KEY)
-            except ImportError:
-                raise ImportError("moorcheh-sdk not installed. Run: pip install moorcheh-sdk")
+        client = _get_moorcheh_client()
         
         if not MOORCHEH_API_KEY:
             raise ValueError("MOORCHEH_API_KEY not found in environment variables")
@@ -183,18 +276,92 @@ Based on the context above, provide a comprehensive and insightful answer. If th
         raise Exception(f"Moorcheh API error: {str(e)}")
 
 
-def _query_gemini_api(query, context_text, similar_articles=None, chat_history=None):
+GEMINI_MODEL = "gemini-3-flash-preview"
+
+
+@lru_cache(maxsize=1)
+def _gemini_client():
+    # Built once: reuses the SDK's HTTP session (keep-alive) across queries
+    from google import genai
+    from google.genai import types
+    return genai.Client(api_key=GEMINI_API_KEY, http_options=types.HttpOptions(timeout=30000))
+
+
+GEMINI_CACHE_TTL = 600  # seconds
+# Gemini refuses to cache prompts under ~1024 tokens (~4 chars per token)
+GEMINI_CACHE_MIN_CHARS = 4096
+GEMINI_CACHE_MAX_ENTRIES = 64
+
+# A context's first use only marks it as seen: uploading costs a blocking
+# round-trip, so it's only worth it once the same context comes back
+# (follow-up turns). One-off questions rely on Gemini's implicit prefix caching.
+_SEEN_ONCE = object()
+
+# blake2b(context_text) -> (cached content name, None after a failure, or _SEEN_ONCE; expiry timestamp)
+_gemini_context_caches = OrderedDict()
+
+
+def _remember_context(key, name, expires):
+    now = time.time()
+    for k in [k for k, (_, exp) in _gemini_context_caches.items() if exp <= now]:
+        del _gemini_context_caches[k]
+    _gemini_context_caches[key] = (name, expires)
+    _gemini_context_caches.move_to_end(key)
+    while len(_gemini_context_caches) > GEMINI_CACHE_MAX_ENTRIES:
+        _gemini_context_caches.popitem(last=False)
+
+
+def _get_cached_context(client, context_text):
+    """
+    Uploads the article block as Gemini cached content the second time it is
+    used and reuses it while it is alive, so follow-up turns only send the
+    question + history. Returns the cache name, or None if there is no cache
+    (first use, below the model's minimum cacheable size, or upload failed).
+    """
+    from google.genai import types
+
+    if len(context_text) < GEMINI_CACHE_MIN_CHARS:
+        return None
+
+    key = hashlib.blake2b(context_text.encode("utf-8"), digest_size=16).digest()
+    entry = _gemini_context_caches.get(key)
+    if entry is None or entry[1] <= time.time():
+        _remember_context(key, _SEEN_ONCE, time.time() + GEMINI_CACHE_TTL)
+        return None
+    if entry[0] is not _SEEN_ONCE:
+        _gemini_context_caches.move_to_end(key)
+        return entry[0]
+
+    try:
+        cache = client.caches.create(
+            model=GEMINI_MODEL,
+            config=types.CreateCachedContentConfig(
+                contents=[context_text],
+                ttl=f"{GEMINI_CACHE_TTL}s"
+            )
+        )
+    except Exception as e:
+        print(f"⚠️ Gemini context cache unavailable: {e}")
+        # Remember the failure so we don't pay an extra round-trip every turn
+        _remember_context(key, None, time.time() + GEMINI_CACHE_TTL)
+        return None
+
+    # Renew a little before the server drops it
+    _remember_context(key, cache.name, time.time() + GEMINI_CACHE_TTL - 30)
+    return cache.name
+
+
+def _query_gemini_api(query, context_text, similar_articles=None, chat_history=None, stream=False):
     """
     Query Gemini 3 Flash Preview ONLY.
     No legacy SDK, no fallbacks.
+    With stream=True, returns a generator of text chunks as Gemini writes them.
     """
 
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY not found in environment variables")
 
-    from google import genai
-
-    client = genai.Client(api_key=GEMINI_API_KEY)
+    client = _gemini_client()
 
     # Article references
     article_refs = ""
@@ -203,16 +370,15 @@ def _query_gemini_api(query, context_text, similar_articles=None, chat_history=N
         for i, (a, _) in enumerate(similar_articles, 1):
             article_refs += f"{i}. {a.get('title')} ({a.get('url')})\n"
 
-    # Conversation history (last 6 messages)
+    # Conversation history (most recent messages only)
     history_block = ""
     if chat_history:
         history_block = "\n\nConversation history:\n"
-        for msg in chat_history[-6:]:
+        for msg in chat_history[-HISTORY_MESSAGES:]:
             role = "User" if msg.get("role") == "user" else "Assistant"
             history_block += f"{role}: {msg.get('content')}\n"
 
-    full_prompt = f"""
-{context_text}
+    prompt_suffix = f"""
 {article_refs}
 {history_block}
 
@@ -225,15 +391,84 @@ INSTRUCTIONS:
 - Cite article titles after quotes
 """
 
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=full_prompt
-    )
+    # The article block is the stable prefix across turns -> send it once
+    cache_name = _get_cached_context(client, context_text)
+    if cache_name:
+        from google.genai import types
+        request = dict(
+            model=GEMINI_MODEL,
+            contents=prompt_suffix,
+            config=types.GenerateContentConfig(cached_content=cache_name)
+        )
+    else:
+        request = dict(
+            model=GEMINI_MODEL,
+            contents=f"\n{context_text}{prompt_suffix}"
+        )
+
+    if stream:
+        return (chunk.text for chunk in client.models.generate_content_stream(**request) if chunk.text)
+    return client.models.generate_content(**request).text
+
 
-    return response.text
+def _collect_stream(chunks, on_done):
+    # Passes chunks through unchanged, then hands the full text to on_done
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    on_done("".join(parts))
 
 
-def _format_context_for_llm(similar_articles, graph=None):
+# Characters of article text per retrieval rank (rank 1, rank 2, then the rest)
+CONTEXT_CHAR_BUDGETS = (2000, 800)
+CONTEXT_CHAR_DEFAULT = 400
+MAX_CONTEXT_TOKENS = 4000
+HISTORY_MESSAGES = 4
+
+
+_RULE = "=" * 80
+_ARTICLE_TEMPLATE = (
+    "\n{rule}\n"
+    "ARTICLE {idx}: \"{title}\"\n"
+    "URL: {url}\n"
+    "Similarity Score: {sim:.1%}{cluster}\n"
+    "{rule}\n"
+    "FULL ARTICLE TEXT:\n{text}\n"
+)
+_CONTINUES = "\n[... article continues ...]"
+
+
+def _rank_limit(rank):
+    return CONTEXT_CHAR_BUDGETS[rank - 1] if rank <= len(CONTEXT_CHAR_BUDGETS) else CONTEXT_CHAR_DEFAULT
+
+
+def _preview(text, limit):
+    return text[:limit] + _CONTINUES if len(text) > limit else text
+
+
+def _fit_to_budget(text, max_tokens=MAX_CONTEXT_TOKENS):
+    # ~4 characters per token is a safe estimate for English prose
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max_chars]
+
+
+def build_title_to_group(graph):
+    """
+    Maps each node label (article title) to its cluster group, so the context
+    formatter does one dict lookup per article instead of scanning every node.
+    """
+    return {
+        graph.nodes[n].get('label'): graph.nodes[n].get('group', 'unknown') for n in graph.nodes()
+    }
+
+
+# LRU of formatted contexts keyed on the retrieved (url, score, cluster) triples
+_context_cache = OrderedDict()
+CONTEXT_CACHE_SIZE = 64
+
+
+def _format_context_for_llm(similar_articles, graph=None, title_to_group=None):
     """
     Format similar articles into a context string for the LLM.
     Includes full article text so Gemini can quote directly from it.
@@ -241,6 +476,7 @@ def _format_context_for_llm(similar_articles, graph=None):
     Parameters:
     - similar_articles (List[Tuple]): List of (article_dict, similarity_score) tuples
     - graph (NetworkX Graph, optional): Graph object for cluster information
+    - title_to_group (dict, optional): Precomputed {title: cluster} map (see build_title_to_group)
     
     Returns:
     - str: Formatted context text with clear article identifiers
@@ -248,49 +484,53 @@ def _format_context_for_llm(similar_articles, graph=None):
     if not similar_articles:
         return "No relevant articles found in the constellation."
     
-    context_parts = []
-    context_parts.append(f"Below are {len(similar_articles)} relevant article(s) found through semantic search:\n")
+    if title_to_group is None and graph:
+        title_to_group = build_title_to_group(graph)
     
-    for idx, (article, similarity) in enumerate(similar_articles, 1):
-        cluster_info = ""
-        if graph:
-            # Try to find the node in the graph by matching title or index
-            for node_id in graph.nodes():
-                if graph.nodes[node_id].get('label') == article.get('title'):
-                    cluster_id = graph.nodes[node_id].get('group', 'unknown')
-                    cluster_info = f" [Cluster: {cluster_id}]"
-                    break
-        
-        # Create a clear article identifier for referencing
-        article_title = article.get('title', 'Unknown')
-        article_url = article.get('url', 'N/A')
-        
-        context_parts.append(f"\n{'='*80}")
-        context_parts.append(f"ARTICLE {idx}: \"{article_title}\"")
-        context_parts.append(f"URL: {article_url}")
-        context_parts.append(f"Similarity Score: {similarity:.1%}{cluster_info}")
-        context_parts.append(f"{'='*80}")
-        
-        # Include more article text so Gemini can quote from it
-        # Increase from 800 to 1500 characters for better context
-        text = article.get('text', '')
-        if len(text) > 1500:
-            text_preview = text[:1500] + "\n[... article continues ...]"
-        else:
-            text_preview = text
-        
-        context_parts.append(f"FULL ARTICLE TEXT:\n{text_preview}\n")
+    # Same retrieval (articles + scores + their clusters) -> same context string
+    cache_key = tuple(
+        (article.get('url'), round(similarity, 4),
+         title_to_group.get(article.get('title'), 'unknown') if title_to_group is not None else None)
+        for article, similarity in similar_articles
+    )
+    if cache_key in _context_cache:
+        _context_cache.move_to_end(cache_key)
+        return _context_cache[cache_key]
     
-    context_parts.append(f"\n{'='*80}")
-    context_parts.append("INSTRUCTIONS: When answering, you MUST quote directly from the article text above.")
-    context_parts.append("Cite articles by their title (e.g., 'According to \"[Article Title]\"...')")
-    context_parts.append(f"{'='*80}")
+    header = f"Below are {len(similar_articles)} relevant article(s) found through semantic search:\n"
+    context_parts = [header] + [
+        _ARTICLE_TEMPLATE.format(
+            rule=_RULE,
+            idx=idx,
+            title=article.get('title', 'Unknown'),
+            url=article.get('url', 'N/A'),
+            sim=similarity,
+            cluster=f" [Cluster: {title_to_group.get(article.get('title'), 'unknown')}]" if title_to_group is not None else "",
+            # Best match gets the most text to quote from, lower ranks just a lead
+            text=_preview(article.get('text', ''), _rank_limit(idx))
+        )
+        for idx, (article, similarity) in enumerate(similar_articles, 1)
+    ]
     
-    return "\n".join(context_parts)
+    # (Quoting instructions live in the prompt itself, not repeated here)
+    context = _fit_to_budget("\n".join(context_parts))
+    _context_cache[cache_key] = context
+    if len(_context_cache) > CONTEXT_CACHE_SIZE:
+        _context_cache.popitem(last=False)
+    return context
+
+
+# Small talk never needs retrieval or an LLM call
+_GREETING_RE = re.compile(r"^(hi|hello|hey|thanks?|thank you|ok(ay)?)[!.\s]*$", re.IGNORECASE)
+GREETING_RESPONSE = "👋 Hi! Ask me anything about the articles in this galaxy."
+
+# Answers to earlier questions, looked up by embedding similarity
+_semantic_cache = SemanticCache()
 
 
 def chat_with_constellation(user_query, articles, graph=None, chat_history=None, top_k=5, similarity_threshold=0.3, 
-                           use_gemini=False, moorcheh_namespace=None):
+                           use_gemini=False, moorcheh_namespace=None, semantic_cache_threshold=0.95,
+                           article_matrix=None, ann_index=None, stream=False, title_to_group=None):
     """
     Main function that orchestrates the entire RAG pipeline.
     
@@ -302,17 +542,23 @@ def chat_with_constellation(user_query, articles, graph=None, chat_history=None,
     
     Parameters:
     - user_query (str): The user's question
-    - articles (List[Dict]): List of article dictionaries, each must have a 'vector' key
+    - articles (List[Dict]): List of article dictionaries; each needs a 'vector' key unless
+      article_matrix is given
     - graph (NetworkX Graph, optional): The graph object for cluster context
     - chat_history (list, optional): Previous conversation messages for context
     - top_k (int): Number of similar articles to retrieve (default: 5)
     - similarity_threshold (float): Minimum similarity score (default: 0.3)
     - use_gemini (bool): If True, use Gemini API instead of Moorcheh (default: False)
     - moorcheh_namespace (str, optional): Moorcheh namespace if using remote vectors
+    - semantic_cache_threshold (float): Cosine similarity at which an earlier answer is reused (default: 0.95)
+    - article_matrix (np.ndarray, optional): Pre-normalized article vectors (see build_article_matrix)
+    - ann_index (hnswlib.Index, optional): HNSW index over the articles (see build_ann_index)
+    - stream (bool): If True, Gemini answers come back as a generator of text chunks
+    - title_to_group (dict, optional): Precomputed {title: cluster} map for the graph
     
     Returns:
     - Dictionary with:
-      - 'response' (str): The AI-generated response
+      - 'response' (str, or generator of str when streaming): The AI-generated response
       - 'similar_articles' (List[Tuple]): List of (article_dict, similarity_score) tuples
       - 'context_used' (str): The formatted context sent to the LLM
     """
@@ -330,16 +576,25 @@ def chat_with_constellation(user_query, articles, graph=None, chat_history=None,
             "context_used": ""
         }
     
+    if _GREETING_RE.match(user_query.strip()):
+        return {
+            "response": GREETING_RESPONSE,
+            "similar_articles": [],
+            "context_used": ""
+        }
+    
     try:
-        # Step 1: Vectorize the query
+        # Step 1: Vectorize the query (lru-cached, so cheap on repeats)
         query_vector = vectorize_query(user_query)
-        
+
         # Step 2: Find similar articles
         similar_articles = find_similar_articles(
             query_vector, 
             articles, 
             top_k=top_k, 
-            similarity_threshold=similarity_threshold
+            similarity_threshold=similarity_threshold,
+            article_matrix=article_matrix,
+            ann_index=ann_index
         )
         
         if not similar_articles:
@@ -349,8 +604,20 @@ def chat_with_constellation(user_query, articles, graph=None, chat_history=None,
                 "context_used": ""
             }
         
+        # Near-duplicate question on the same galaxy -> reuse the earlier answer
+        # (only for stand-alone questions; follow-ups depend on the chat history)
+        cache_scope = (tuple(a.get('url') for a in articles), use_gemini, moorcheh_namespace)
+        if not chat_history:
+            cached_response = _semantic_cache.lookup(query_vector, cache_scope, threshold=semantic_cache_threshold)
+            if cached_response is not None:
+                return {
+                    "response": cached_response,
+                    "similar_articles": similar_articles,
+                    "context_used": ""
+                }
+
         # Step 3: Format context
-        context_text = _format_context_for_llm(similar_articles, graph)
+        context_text = _format_context_for_llm(similar_articles, graph, title_to_group=title_to_group)
         
         # Step 4: Generate response using LLM
         # Based on semantic search results, we know which articles are relevant
@@ -360,7 +627,8 @@ def chat_with_constellation(user_query, articles, graph=None, chat_history=None,
                 response = "⚠️ Gemini API key not configured. Please set GEMINI_API_KEY in your .env file."
             else:
                 # Pass similar_articles and chat_history so Gemini knows which articles to quote from and maintains context
-                response = _query_gemini_api(user_query, context_text, similar_articles=similar_articles, chat_history=chat_history)
+                response = _query_gemini_api(user_query, context_text, similar_articles=similar_articles,
+                                             chat_history=chat_history, stream=stream)
         else:
             # Try Moorcheh first, fallback to Gemini if available
             if MOORCHEH_API_KEY:
@@ -387,6 +655,15 @@ Here's what I found:
 
 Note: To get AI-generated summaries and analysis with direct quotes, please configure either MOORCHEH_API_KEY or GEMINI_API_KEY in your .env file."""
         
+        if not chat_history:
+            if not isinstance(response, str):
+                # Streamed answer: cache it once the last chunk has arrived
+                response = _collect_stream(
+                    response, lambda text: _semantic_cache.insert(query_vector, cache_scope, text)
+                )
+            elif not response.startswith(("⚠️", "❌")):
+                _semantic_cache.insert(query_vector, cache_scope, response)
+        
         return {
             "response": response,
             "similar_articles": similar_articles,
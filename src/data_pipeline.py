@@ -1,17 +1,94 @@
 import os
+import json
+import logging
+import queue
+import asyncio
+import threading
+import multiprocessing
+import httpx
 import requests
-import newspaper
-from newspaper import Config
-from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urlparse, urlsplit, urlunsplit
 from datetime import datetime, timedelta
+from functools import lru_cache
 from dateutil.relativedelta import relativedelta
 import dotenv
+from src.scrape_pool import DomainRateLimiter
+# NewsAPI results and parsed articles are cached on disk, so repeat runs skip the network entirely
+from src.disk_cache import cache_get, cache_put, NEWSAPI_CACHE_TTL, ARTICLE_CACHE_TTL
+
+# Optional: orjson decodes the NewsAPI payload several times faster than stdlib json
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Optional: readability + lxml extract the main text ~3x faster than newspaper's parse()
+try:
+    from readability import Document
+    import lxml.html
+    _HAS_READABILITY = True
+except ImportError:
+    _HAS_READABILITY = False
 
 # Load environment variables
 dotenv.load_dotenv()
 
 NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 
+# Per-article messages go through logging (lazy %-formatting, silent unless enabled)
+# instead of print, which serializes the scrape workers on stdout
+log = logging.getLogger(__name__)
+
+# Pretend to be a browser (Chrome) to avoid 403 blocks
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Shared newspaper config (read-only, so every worker thread can use it)
+# Pretend to be a browser (Chrome); no image size probing, no on-disk memoization,
+# no extra request for <meta http-equiv="refresh"> redirects
+# newspaper (NLTK, jieba, ...) is only imported when the fallback parser actually runs
+@lru_cache(maxsize=1)
+def _newspaper_config():
+    from newspaper import Config
+    config = Config()
+    config.browser_user_agent = USER_AGENT
+    config.request_timeout = 10
+    config.fetch_images = False
+    config.memoize_articles = False
+    config.follow_meta_refresh = False
+    config.MIN_WORD_COUNT = 50
+    return config
+
+# Synchronous HTTP/2 client for page downloads outside the async pipeline:
+# repeat pages on one host are multiplexed over a single connection
+@lru_cache(maxsize=1)
+def _page_client():
+    return httpx.Client(
+        http2=True,
+        headers={"User-Agent": USER_AGENT},
+        limits=httpx.Limits(max_keepalive_connections=20),
+        timeout=10,
+        follow_redirects=True,
+    )
+
+# Simultaneous downloads allowed against a single host
+PER_HOST_CONCURRENCY = 4
+# ...and the minimum gap between two request starts on that host
+PER_HOST_MIN_INTERVAL = 0.05
+# Downloads per URL before it is skipped
+FETCH_ATTEMPTS = 2
+
+# One pooled session for NewsAPI (keep-alive instead of a new TLS handshake per call)
+_SESSION = requests.Session()
+_SESSION.headers.update({"User-Agent": USER_AGENT})
+_SESSION.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=20,
+                                       max_retries=Retry(total=2, backoff_factor=0.3)))
+
 def get_month_range(months_back: int):
     """
     months_back=0 -> current month
@@ -91,9 +168,16 @@ def fetch_news_urls(topic="Technology", limit=10, mock=True, lang="en", months_b
         "pageSize": limit,
     }
 
+    # Same topic + month (the date range is in the key) -> cached URL list
+    cache_key = json.dumps({k: v for k, v in params.items() if k != "apiKey"}, sort_keys=True)
+    cached = cache_get("newsapi", cache_key, NEWSAPI_CACHE_TTL)
+    if cached is not None:
+        print(f"✅ Found {len(cached)} cached articles for topic: {topic}")
+        return cached
+
     try:
-        response = requests.get(url, params=params)
-        data = response.json()
+        response = _SESSION.get(url, params=params, timeout=10)
+        data = _loads(response.content)
         
         if data.get("status") != "ok":
             print(f"❌ API Error: {data.get('message')}")
@@ -105,66 +189,233 @@ def fetch_news_urls(topic="Technology", limit=10, mock=True, lang="en", months_b
 
         urls = [article['url'] for article in data.get('articles', [])]
         print(f"✅ Found {len(urls)} articles for topic: {topic}")
+        cache_put("newsapi", cache_key, urls)
         return urls
         
     except Exception as e:
         print(f"❌ Connection Error: {e}")
         return []
 
-def scrape_single_article(url):
+def _canonical_url(url):
+    # Lowercase host, drop the fragment and trailing slash (query strings can matter, keep them)
+    parts = urlsplit(url)
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip('/') or '/', parts.query, ''))
+
+def _dedupe_urls(urls):
+    """
+    Drops URLs whose canonical form was already seen, keeping the first one
+    as given (the canonical form is only a comparison key: some sites need
+    the trailing slash, so the original address is what gets fetched).
+    """
+    unique = {}
+    for url in urls:
+        unique.setdefault(_canonical_url(url), url)
+    return list(unique.values())
+
+def _is_retryable(error):
+    # Network hiccups, server errors and rate limiting can pass on a second try
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+async def _fetch(client, url):
+    r = await client.get(url)
+    r.raise_for_status()
+    return r.text
+
+# Worker processes for parsing, started on first use and reused across scrapes.
+# Never forked from the (multi-threaded) Streamlit server: a fork can copy a lock
+# another thread holds and deadlock the child. forkserver/spawn start clean workers.
+_PARSE_POOL = None
+_PARSE_POOL_LOCK = threading.Lock()
+
+def _get_parse_pool():
+    global _PARSE_POOL
+    with _PARSE_POOL_LOCK:
+        if _PARSE_POOL is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _PARSE_POOL = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                              mp_context=multiprocessing.get_context(method))
+        return _PARSE_POOL
+
+def _discard_parse_pool(pool):
+    # A worker died: forget the broken pool so the next parse starts a fresh one
+    global _PARSE_POOL
+    with _PARSE_POOL_LOCK:
+        if _PARSE_POOL is pool:
+            _PARSE_POOL = None
+    pool.shutdown(wait=False)
+
+async def _scrape_all(urls, results):
+    """
+    Downloads every URL concurrently and parses each page the moment it lands,
+    pushing (index, article) onto `results` as soon as it is ready.
+    """
+    loop = asyncio.get_running_loop()
+    # Be polite per origin (the mock set is 30 pages on one host) while the
+    # client's connection limit keeps overall concurrency high
+    host_limits = defaultdict(lambda: asyncio.Semaphore(PER_HOST_CONCURRENCY))
+    limiter = DomainRateLimiter(PER_HOST_MIN_INTERVAL)
+    # HTTP/2: same-host pages (e.g. the britannica mock set) share one multiplexed connection
+    async with httpx.AsyncClient(
+        http2=True,
+        headers={"User-Agent": USER_AGENT},
+        limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        timeout=10,
+        follow_redirects=True,
+    ) as client:
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            async def scrape_one(index, url):
+                cached = cache_get("article", url, ARTICLE_CACHE_TTL)
+                if cached is not None:
+                    results.put((index, cached))
+                    return
+                html = None
+                # One retry, still under the host's semaphore and rate limit
+                # (a failing host shouldn't get hammered by unthrottled re-downloads)
+                for attempt in range(FETCH_ATTEMPTS):
+                    try:
+                        async with host_limits[urlparse(url).netloc]:
+                            await limiter.wait(url)
+                            html = await _fetch(client, url)
+                        break
+                    except Exception as e:
+                        log.debug("Fetch failed (%s/%s) %s: %s", attempt + 1, FETCH_ATTEMPTS, url, e)
+                        if not _is_retryable(e):
+                            break  # e.g. 403/404: a second download gets the same answer
+                if html is None:
+                    return  # Skip the URL
+                # Parsing is CPU-bound and holds the GIL -> separate processes
+                pool = _get_parse_pool()
+                try:
+                    article = await loop.run_in_executor(pool, parse_article_html, url, html)
+                except BrokenProcessPool:
+                    _discard_parse_pool(pool)
+                    article = await loop.run_in_executor(executor, parse_article_html, url, html)
+                if article is not None:
+                    # Cache writes stay in this process (workers only parse)
+                    await loop.run_in_executor(executor, cache_put, "article", url, article)
+                    results.put((index, article))
+
+            await asyncio.gather(*[scrape_one(i, u) for i, u in enumerate(urls)])
+
+def _meta(tree, prop):
+    return next(iter(tree.xpath(f"//meta[@property='{prop}']/@content")), None)
+
+def _parse_with_readability(url, html):
+    """Main-text extraction with readability; title/image/date come from the page's meta tags."""
+    doc = Document(html)
+    body = lxml.html.fromstring(doc.summary())
+    text = "\n".join(line.strip() for line in body.text_content().splitlines() if line.strip())
+    tree = lxml.html.fromstring(html)
+    return {
+        "title": _meta(tree, "og:title") or doc.short_title(),
+        "text": text,
+        "url": url,
+        "image": _meta(tree, "og:image"),
+        "date": _meta(tree, "article:published_time")
+    }
+
+def parse_article_html(url, html):
+    """
+    Extracts title, body text, image and date from a downloaded page.
+    Returns None if the page can't be parsed or is too short to be an article.
+    Top-level and free of side effects, so it can run in a parse worker process.
+    """
+    try:
+        if _HAS_READABILITY:
+            result = _parse_with_readability(url, html)
+        else:
+            import newspaper
+            article = newspaper.Article(url, config=_newspaper_config())
+            article.download(input_html=html)
+            article.parse()
+            result = {
+                "title": article.title,
+                "text": article.text,
+                "url": url,
+                # og:image is one xpath on the already-parsed tree
+                "image": _meta(article.doc, "og:image") or article.top_image,
+                # ISO string like the readability path, so a disk-cache hit has the same type
+                "date": article.publish_date.isoformat() if article.publish_date else None
+            }
+    except Exception as e:
+        log.warning("❌ Failed to parse %s: %s", url, e)
+        return None
+
+    # 3. Validation
+    if len(result["text"]) < 100:
+        log.info("⚠️ Skipped (Too short): %s", url)
+        return None
+    return result
+
+def scrape_single_article(url, html=None):
     """
     Step 2: Go to the URL and extract the body text.
     Uses custom User-Agent to avoid 403 blocks.
+    If `html` was already downloaded, only the parse step runs.
     """
     try:
-        # 1. Config: Pretend to be a browser (Chrome)
-        user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        config = Config()
-        config.browser_user_agent = user_agent
-        config.request_timeout = 10
-
-        # 2. Download
-        article = newspaper.Article(url, config=config)
-        article.download()
-        article.parse()
-        
-        # 3. Validation
-        if len(article.text) < 100:
-            print(f"⚠️ Skipped (Too short): {url}")
-            return None
-            
-        return {
-            "title": article.title,
-            "text": article.text,
-            "url": url,
-            "image": article.top_image,  # <--- NEW LINE
-            "date": article.publish_date
-        }
+        # 2. Download (skipped when the page was prefetched)
+        if html is None:
+            response = _page_client().get(url)
+            response.raise_for_status()
+            html = response.text
+        result = parse_article_html(url, html)
+        if result is not None:
+            cache_put("article", url, result)
+        return result
     except Exception as e:
-        # NOW WE PRINT THE ERROR so you know why it failed
-        print(f"❌ Failed to scrape {url}: {e}")
+        # Log the error so you know why it failed
+        log.warning("❌ Failed to scrape %s: %s", url, e)
         return None
 
-def get_full_articles(topic="Technology", limit=10, mock=False, lang="en",months_back=0):
+def stream_full_articles(topic="Technology", limit=10, mock=False, lang="en", months_back=0):
     """
-    The Main Function: Combines Fetching + Scraping (Threaded)
+    Generator version of get_full_articles.
+    Yields (index, article) in completion order, so callers can start
+    embedding while slower pages are still downloading.
+    `index` is the article's position in the URL list.
     """
     
-    # 1. Get URLs
+    # 1. Get URLs (duplicates, e.g. the same story with a #fragment, are scraped once)
     urls = fetch_news_urls(topic, limit, mock, lang, months_back=months_back)
+    urls = _dedupe_urls(urls)
     if not urls:
-        return []
+        return
 
     print(f"🚀 Scraping {len(urls)} articles in parallel...")
     
-    # 2. Scrape in parallel (Speed boost!)
-    valid_articles = []
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        results = list(executor.map(scrape_single_article, urls))
+    # 2. Download + parse on a background event loop, hand results over a queue
+    results = queue.Queue()
+
+    def run_pipeline():
+        try:
+            asyncio.run(_scrape_all(urls, results))
+        except Exception as e:
+            print(f"❌ Scrape pipeline failed: {e}")
+        finally:
+            results.put(None)  # Sentinel: no more articles
+
+    threading.Thread(target=run_pipeline, daemon=True).start()
+
+    while True:
+        item = results.get()
+        if item is None:
+            break
+        yield item
+
+def get_full_articles(topic="Technology", limit=10, mock=False, lang="en",months_back=0):
+    """
+    The Main Function: Combines Fetching + Scraping (Async download, threaded parse)
+    """
+    
+    scraped = list(stream_full_articles(topic, limit, mock, lang, months_back=months_back))
     
-    # 3. Clean up None values (failed scrapes)
-    valid_articles = [r for r in results if r is not None]
+    # Restore the original URL order (failed scrapes are simply missing)
+    valid_articles = [art for _, art in sorted(scraped, key=lambda item: item[0])]
     
     print(f"🎉 Successfully scraped {len(valid_articles)} full articles!")
     
-    return valid_articles
\ No newline at end of file
+    return valid_articles
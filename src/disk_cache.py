@@ -0,0 +1,71 @@
+"""
+Small JSON disk cache for News Constellation.
+NewsAPI results and parsed articles (galaxy pipeline) and scraped article text
+(Bias Neutralizer) are stored as one file per entry, keyed by kind + SHA-256 of
+the key, and expire by file age.
+"""
+import os
+import json
+import time
+import hashlib
+import tempfile
+
+CACHE_DIR = "./.http_cache"
+NEWSAPI_CACHE_TTL = 6 * 3600  # seconds
+ARTICLE_CACHE_TTL = 24 * 3600
+# Files older than the longest TTL are deleted, at most once per PRUNE_INTERVAL
+MAX_AGE = ARTICLE_CACHE_TTL
+PRUNE_INTERVAL = 600
+
+_last_prune = 0.0
+
+
+def _cache_path(kind, key):
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"{kind}_{digest}.json")
+
+
+def cache_get(kind, key, ttl):
+    """Returns the cached value, or None if it is missing, expired or unreadable."""
+    path = _cache_path(kind, key)
+    try:
+        if time.time() - os.stat(path).st_mtime < ttl:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+    except (OSError, ValueError):
+        pass  # Not cached yet (or unreadable)
+    return None
+
+
+def cache_put(kind, key, value):
+    """
+    Stores a JSON-serializable value (temp file + rename, so readers never see half a file).
+    Values must be plain JSON types (dates as ISO strings), so a hit returns what a miss did.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp_path, _cache_path(kind, key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        _prune()
+    except (OSError, TypeError, ValueError) as e:
+        print(f"⚠️ Could not write cache: {e}")
+
+
+def _prune():
+    global _last_prune
+    now = time.time()
+    if now - _last_prune < PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    for entry in os.scandir(CACHE_DIR):
+        try:
+            if now - entry.stat().st_mtime >= MAX_AGE:
+                os.remove(entry.path)
+        except OSError:
+            pass  # Removed by another session in the meantime
@@ -0,0 +1,101 @@
+"""
+Persistent embedding cache for News Constellation.
+Vectors are keyed by model id + SHA-256 of the text, so the same article
+is only ever sent through the embedding model once (across sessions too).
+"""
+import os
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+CACHE_DIR = "./.embed_cache"
+CACHE_DB = os.path.join(CACHE_DIR, "embeddings.sqlite")
+
+# In-process LRU layer on top of the sqlite file (key -> float32 vector)
+_memory = OrderedDict()
+MEMORY_CACHE_MAX = 4096  # ~6 MB of 384-d float32 vectors
+_lock = threading.Lock()
+
+
+def _cache_key(text, model_id):
+    # Model id is part of the key so swapping models invalidates cleanly
+    sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{model_id}:{sha}"
+
+
+def _remember(key, vector):
+    # Caller holds _lock
+    _memory[key] = vector
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_CACHE_MAX:
+        _memory.popitem(last=False)
+
+
+def _connect():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(CACHE_DB)
+    conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)")
+    return conn
+
+
+def get_or_compute(texts, encode_fn, model_id):
+    """
+    Returns an (N x D) float32 matrix of embeddings for `texts`.
+
+    Parameters:
+    - texts (List[str]): Texts to embed (one per article)
+    - encode_fn (callable): Embeds a list of texts, returns a 2D array
+    - model_id (str): Name of the embedding model (part of the cache key)
+    """
+    keys = [_cache_key(t, model_id) for t in texts]
+    vectors = [None] * len(texts)
+
+    with _lock:
+        # 1. Memory hits
+        for i, key in enumerate(keys):
+            if key in _memory:
+                _memory.move_to_end(key)
+                vectors[i] = _memory[key]
+
+        # 2. Disk hits
+        missing = [keys[i] for i, v in enumerate(vectors) if v is None]
+        if missing:
+            try:
+                conn = _connect()
+                with conn:
+                    placeholders = ",".join("?" * len(missing))
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", missing
+                    ).fetchall()
+                conn.close()
+                found = {key: np.frombuffer(blob, dtype=np.float32) for key, blob in rows}
+                for i, key in enumerate(keys):
+                    if vectors[i] is None and key in found:
+                        vectors[i] = found[key]
+                        _remember(key, found[key])
+            except sqlite3.Error as e:
+                print(f"⚠️ Embedding cache unavailable: {e}")
+
+    # 3. Only the misses go to the model (one batch)
+    miss_idx = [i for i, v in enumerate(vectors) if v is None]
+    if miss_idx:
+        print(f"🧠 Embedding {len(miss_idx)} new texts ({len(texts) - len(miss_idx)} cached)")
+        fresh = np.asarray(encode_fn([texts[i] for i in miss_idx]), dtype=np.float32)
+
+        with _lock:
+            rows = []
+            for row, i in enumerate(miss_idx):
+                vectors[i] = fresh[row]
+                _remember(keys[i], fresh[row])
+                rows.append((keys[i], fresh[row].tobytes()))
+            try:
+                conn = _connect()
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+                conn.close()
+            except sqlite3.Error as e:
+                print(f"⚠️ Could not write embedding cache: {e}")
+
+    return np.vstack(vectors).astype(np.float32, copy=False)
@@ -1,36 +1,84 @@
-import networkx as nx
-from pyvis.network import Network
-import community.community_louvain as community_louvain
 import os
+import re
+import hashlib
+import json
+import string
+import logging
+import time
+import tempfile
+import threading
 import numpy as np
-from textblob import TextBlob
-import matplotlib.cm as cm
-import matplotlib.colors as mcolors
 from urllib.parse import urlparse
-from collections import Counter
+from collections import Counter, OrderedDict, defaultdict
+from functools import lru_cache
+from importlib.util import find_spec
+
+# Optional: igraph's C community detection is much faster than pure-Python Louvain
+try:
+    import igraph as ig
+    _HAS_IGRAPH = True
+except ImportError:
+    _HAS_IGRAPH = False
+
+log = logging.getLogger(__name__)
 
 # --- HELPER: SENTIMENT COLOR (Red=Bad, Green=Good) ---
+# matplotlib and VADER are only imported the first time a sentiment colour is
+# needed (the first Sentiment-mode render), keeping them off the cold-start path
+@lru_cache(maxsize=None)
+def _sentiment_deps():
+    import matplotlib
+    import matplotlib.colors as mcolors
+    from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+    # VADER is a plain lexicon lookup (no POS tagging), built once per process
+    return SentimentIntensityAnalyzer(), matplotlib.colormaps['RdYlGn'], mcolors.to_hex
+
+def _polarity(text):
+    sia, _, _ = _sentiment_deps()
+    return sia.polarity_scores(text)['compound'] # -1.0 to 1.0
+
 def get_sentiment_color(text):
-    blob = TextBlob(text)
-    score = blob.sentiment.polarity # -1.0 to 1.0
-    normalized = (score + 1) / 2
-    cmap = cm.get_cmap('RdYlGn')
-    rgba = cmap(normalized)
-    return mcolors.to_hex(rgba)
+    _, cmap, to_hex = _sentiment_deps()
+    normalized = (_polarity(text) + 1) / 2
+    return to_hex(cmap(normalized))
 
 # --- HELPER: POLITICAL COLOR (Blue=Left, Red=Right) ---
+_LEFT_WING = frozenset(['cnn.com', 'msnbc.com', 'huffpost.com', 'vox.com', 'guardian.com', 'theguardian.com',
+                        'nytimes.com', 'bbc.com', 'washingtonpost.com'])
+_RIGHT_WING = frozenset(['foxnews.com', 'breitbart.com', 'nypost.com', 'dailymail.co.uk', 'washingtontimes.com', 'wsj.com'])
+
 def get_political_color(url):
-    domain = urlparse(url).netloc.lower()
-    left_wing = ['cnn.com', 'msnbc.com', 'huffpost.com', 'vox.com', 'guardian.com', 'nytimes.com', 'bbc.com', 'washingtonpost.com']
-    right_wing = ['foxnews.com', 'breitbart.com', 'nypost.com', 'dailymail.co.uk', 'washingtontimes.com', 'wsj.com']
-    
-    for site in left_wing:
-        if site in domain: return "#3498db" # BLUE
-    for site in right_wing:
-        if site in domain: return "#e74c3c" # RED
+    # Match the domain and each parent domain (edition.cnn.com -> cnn.com) with set lookups
+    parts = urlparse(url).netloc.lower().split('.')
+    suffixes = ['.'.join(parts[k:]) for k in range(len(parts))]
+    if any(d in _LEFT_WING for d in suffixes): return "#3498db" # BLUE
+    if any(d in _RIGHT_WING for d in suffixes): return "#e74c3c" # RED
     return "#95a5a6" # GREY
 
+# --- HELPER: PRECOMPUTE COLORS (once per article set, not per render) ---
+def compute_node_colors(articles):
+    """
+    Returns {"Politics": [...]} with one hex color per article, so switching the
+    color mode is a list lookup. "Sentiment" is added to the same dict the first
+    time that mode is rendered (see sentiment_node_colors), so galaxies that never
+    use it don't load VADER / matplotlib.
+    """
+    return {"Politics": [get_political_color(art['url']) for art in articles]}
+
+def sentiment_node_colors(articles):
+    """One hex color per article from its headline + lead sentiment."""
+    _, cmap, to_hex = _sentiment_deps()
+    polarities = np.array([_polarity(art['title'] + " " + art['text'][:200]) for art in articles])
+    # One colormap call for the whole batch
+    rgba = cmap((polarities + 1) / 2) if len(articles) else []
+    return [to_hex(c) for c in rgba]
+
 # --- NEW HELPER: CLICKBAIT CALCULATOR (Heuristic) ---
+_UPPER_TABLE = str.maketrans('', '', string.ascii_uppercase)
+_TRIGGERS = ["shocking", "destroyed", "slammed", "secret", "miracle", "finally", 
+             "you won't believe", "worst", "best", "exposed", "panic"]
+_TRIGGER_RE = re.compile('|'.join(map(re.escape, _TRIGGERS)), re.IGNORECASE)
+
 def calculate_clickbait_score(headline):
     """
     Returns a score 0-100 based on sensationalism heuristics.
@@ -38,8 +86,8 @@ def calculate_clickbait_score(headline):
     score = 0
     if not headline: return 0
     
-    # 1. Caps Lock Ratio (e.g. "SHOCKING")
-    caps_count = sum(1 for c in headline if c.isupper())
+    # 1. Caps Lock Ratio (e.g. "SHOCKING") -- counted in C by deleting the capitals
+    caps_count = len(headline) - len(headline.translate(_UPPER_TABLE))
     if len(headline) > 5 and (caps_count / len(headline) > 0.3):
         score += 30
         
@@ -47,46 +95,149 @@ def calculate_clickbait_score(headline):
     if "!" in headline: score += 15
     if "?" in headline: score += 10
     
-    # 3. Trigger Words
-    triggers = ["shocking", "destroyed", "slammed", "secret", "miracle", "finally", 
-                "you won't believe", "worst", "best", "exposed", "panic"]
-    if any(t in headline.lower() for t in triggers):
+    # 3. Trigger Words (one regex scan instead of 11 substring searches)
+    if _TRIGGER_RE.search(headline):
         score += 25
         
     return min(score, 100)
 
 # --- NEW HELPER: THEME EXTRACTOR ---
+_STOP_WORDS = frozenset(['the', 'and', 'to', 'of', 'a', 'in', 'is', 'for', 'on', 'with', 'at', 'by', 'an', 'be', 'from', 'that', 'it', 'as', 'are', 'this', 'was', 'or', 'new', 'how', 'why', 'what', 'who', 'when', 'where', 'video', 'watch'])
+
+@lru_cache(maxsize=4096)
+def _title_tokens(title):
+    # Distinct theme words of one headline; cached so graph rebuilds don't re-tokenize
+    words = dict.fromkeys(title.lower().split())
+    return tuple(w for w in words if w.isalpha() and w not in _STOP_WORDS and len(w) > 2)
+
 def get_cluster_theme(articles_in_cluster):
-    stop_words = set(['the', 'and', 'to', 'of', 'a', 'in', 'is', 'for', 'on', 'with', 'at', 'by', 'an', 'be', 'from', 'that', 'it', 'as', 'are', 'this', 'was', 'or', 'new', 'how', 'why', 'what', 'who', 'when', 'where', 'video', 'watch'])
-    all_words = []
-    for art in articles_in_cluster:
-        words = set(art['title'].lower().split()) 
-        filtered = [w for w in words if w.isalpha() and w not in stop_words and len(w) > 2]
-        all_words.extend(filtered)
+    word_counts = Counter(w for art in articles_in_cluster for w in _title_tokens(art['title']))
     
-    if not all_words: return "Cluster"
+    if not word_counts: return "Cluster"
     
     # Top 2 most frequent words
-    most_common = Counter(all_words).most_common(2)
+    most_common = word_counts.most_common(2)
     # Join with a newline for a nice box shape
     theme_label = "\n".join([w[0].title() for w in most_common])
     return theme_label
 
-def build_network_graph(articles, sim_matrix, threshold=0.4, color_mode="Cluster"):
-    print(f"Building Graph (Threshold: {threshold}, Mode: {color_mode})...")
+# --- HELPER: INT8 SIMILARITY MATRIX ---
+# Similarities are stored as round(sim * 100) in int8: 4x smaller than float32.
+# The 0.05-step thresholds map exactly to integers, but the similarities are
+# rounded: a pair within ±0.005 of the threshold can gain or lose its edge
+# compared to the float32 matrix (invisible at the slider's 0.05 resolution).
+SIMILARITY_SCALE = 100
+
+def quantize_similarity(sim_matrix):
+    q = np.round(np.asarray(sim_matrix, dtype=np.float32) * SIMILARITY_SCALE)
+    return q.clip(-SIMILARITY_SCALE, SIMILARITY_SCALE).astype(np.int8)
+
+# --- HELPER: COMMUNITY DETECTION ---
+def detect_communities(G):
+    """
+    Returns {node: cluster_id}. Uses igraph's C Leiden (modularity) when available,
+    otherwise NetworkX's built-in Louvain. Edges are treated as unweighted,
+    same as the original best_partition did with our 'value' edge attribute.
+    """
+    if not _HAS_IGRAPH:
+        import networkx as nx
+        communities = nx.community.louvain_communities(G, weight=None)
+        return {node: cid for cid, members in enumerate(communities) for node in members}
+    nodes = list(G.nodes())
+    index = {n: k for k, n in enumerate(nodes)}
+    iG = ig.Graph(n=len(nodes), edges=[(index[u], index[v]) for u, v in G.edges()])
+    # Leiden guarantees connected communities (Louvain can split them badly)
+    return dict(zip(nodes, iG.community_leiden(objective_function="modularity").membership))
+
+# --- TOOLTIP ---
+# Clickbait buckets, checked top-down: (score above, color, label)
+CB_BUCKETS = [(60, "#e74c3c", "High Clickbait"), (30, "#f1c40f", "Sensational"), (-1, "#2ecc71", "Reliable")]
+
+# One %-template for every node's hover card
+_TOOLTIP_TMPL = (
+    "<div style='font-family: Arial; min-width: 200px;'>"
+    "   <b>%(title)s</b><br>"
+    "   <span style='font-size: 10px; color: gray;'>%(url30)s...</span><br>"
+    
+    # NEW: Clickbait Meter
+    "   <div style='margin-top: 5px; margin-bottom: 8px; font-size: 12px; border: 1px solid #444; padding: 4px; border-radius: 4px;'>"
+    "      <span style='color: #bbb;'>Clickbait Score: </span>"
+    "      <span style='color: %(cb_color)s; font-weight: bold;'>%(cb_score)s%% (%(cb_label)s)</span>"
+    "   </div>"
+    
+    "   🔗 <a href='%(url)s' target='_blank' style='color: #4da6ff; text-decoration: none;'><b>Read This Article</b></a><br><br>"
+    
+    "   <div style='background-color: #2c2c2c; padding: 8px; border-radius: 5px; margin-top: 5px;'>"
+    "      <span style='font-size: 12px; color: #ff9f43;'><b>🔄 Perspective Flip</b></span><br>"
+    "      <span style='font-size: 10px; color: #ccc;'>Different Viewpoint:</span><br>"
+    "      <a href='%(cp_url)s' target='_blank' style='color: #ff9f43; text-decoration: none;'>%(cp_title)s</a>"
+    "   </div>"
+    "</div>"
+)
+
+# (matrix, threshold) fingerprint -> community partition
+# (shared by every session's script thread, so all access goes through the lock)
+_PARTITION_CACHE = OrderedDict()
+_PARTITION_LOCK = threading.Lock()
+PARTITION_CACHE_SIZE = 32
+
+def _get_partition(key):
+    with _PARTITION_LOCK:
+        partition = _PARTITION_CACHE.get(key)
+        if partition is not None:
+            _PARTITION_CACHE.move_to_end(key)
+        return partition
+
+def _store_partition(key, partition):
+    """Caches `partition`; if another session stored one first, that one wins (stable clusters)."""
+    with _PARTITION_LOCK:
+        partition = _PARTITION_CACHE.setdefault(key, partition)
+        _PARTITION_CACHE.move_to_end(key)
+        while len(_PARTITION_CACHE) > PARTITION_CACHE_SIZE:
+            _PARTITION_CACHE.popitem(last=False)
+        return partition
+
+# Self + 2 weak links is the most Pass 2 ever inspects per row
+BRIDGE_CANDIDATES = 3
+# Below this many articles NumPy's argpartition is already instant.
+# numba is optional (not in requirements.txt) and only imported past this size;
+# the app's 30-article galaxies always take the NumPy path.
+NUMBA_MIN_ROWS = 500
+_HAS_NUMBA = find_spec("numba") is not None
+
+def _prepare_matrix(sim_matrix):
+    # int8 (quantized) matrices stay as-is; anything else is narrowed to float32
+    if sim_matrix.dtype != np.int8:
+        return np.ascontiguousarray(sim_matrix, dtype=np.float32)
+    return np.ascontiguousarray(sim_matrix)
+
+def _partition_key(sim_matrix, threshold):
+    return hashlib.blake2b(sim_matrix.tobytes() + str((sim_matrix.shape[0], threshold)).encode(), digest_size=16).digest()
+
+def build_network_graph(articles, sim_matrix, threshold=0.4, color_mode="Cluster", precomputed_colors=None):
+    log.debug("Building Graph (Threshold: %s, Mode: %s)...", threshold, color_mode)
+    import networkx as nx
     G = nx.Graph()
 
+    sim_matrix = _prepare_matrix(sim_matrix)
+    if color_mode == "Sentiment" and precomputed_colors is not None and "Sentiment" not in precomputed_colors:
+        # Scored on first use, then kept alongside the other precomputed colors
+        precomputed_colors["Sentiment"] = sentiment_node_colors(articles)
     rows, cols = sim_matrix.shape
+    # Quantized matrices are compared in integer units (see quantize_similarity)
+    scale = SIMILARITY_SCALE if sim_matrix.dtype == np.int8 else 1
+    threshold_q = round(threshold * scale) if scale != 1 else threshold
     DEFAULT_IMG = "https://upload.wikimedia.org/wikipedia/commons/thumb/8/80/Wikipedia-logo-v2.svg/1200px-Wikipedia-logo-v2.svg.png"
 
+    # Perspective Flip Logic: least similar other article, all rows in one reduction
+    S = sim_matrix.copy()
+    np.fill_diagonal(S, scale)  # i.e. 1.0
+    counterpoints = S.argmin(axis=1).tolist()
+
     # 1. Add Nodes
     for i, art in enumerate(articles):
         
-        # Perspective Flip Logic
-        sim_scores = sim_matrix[i].copy()
-        sim_scores[i] = 1.0 
-        counterpoint_idx = np.argmin(sim_scores)
-        counterpoint_art = articles[counterpoint_idx]
+        counterpoint_art = articles[counterpoints[i]]
         
         img_url = art.get('image') or DEFAULT_IMG
 
@@ -94,40 +245,25 @@ def build_network_graph(articles, sim_matrix, threshold=0.4, color_mode="Cluster
         cb_score = calculate_clickbait_score(art['title'])
         
         # Color code the score for the tooltip
-        cb_color = "#2ecc71" # Green (Safe)
-        cb_label = "Reliable"
-        if cb_score > 30: 
-            cb_color = "#f1c40f" # Yellow
-            cb_label = "Sensational"
-        if cb_score > 60: 
-            cb_color = "#e74c3c" # Red
-            cb_label = "High Clickbait"
+        cb_color, cb_label = next((c, l) for floor, c, l in CB_BUCKETS if cb_score > floor)
 
         # --- UPDATED TOOLTIP HTML ---
-        tooltip_html = (
-            f"<div style='font-family: Arial; min-width: 200px;'>"
-            f"   <b>{art['title']}</b><br>"
-            f"   <span style='font-size: 10px; color: gray;'>{art['url'][:30]}...</span><br>"
-            
-            # NEW: Clickbait Meter
-            f"   <div style='margin-top: 5px; margin-bottom: 8px; font-size: 12px; border: 1px solid #444; padding: 4px; border-radius: 4px;'>"
-            f"      <span style='color: #bbb;'>Clickbait Score: </span>"
-            f"      <span style='color: {cb_color}; font-weight: bold;'>{cb_score}% ({cb_label})</span>"
-            f"   </div>"
-            
-            f"   🔗 <a href='{art['url']}' target='_blank' style='color: #4da6ff; text-decoration: none;'><b>Read This Article</b></a><br><br>"
-            
-            f"   <div style='background-color: #2c2c2c; padding: 8px; border-radius: 5px; margin-top: 5px;'>"
-            f"      <span style='font-size: 12px; color: #ff9f43;'><b>🔄 Perspective Flip</b></span><br>"
-            f"      <span style='font-size: 10px; color: #ccc;'>Different Viewpoint:</span><br>"
-            f"      <a href='{counterpoint_art['url']}' target='_blank' style='color: #ff9f43; text-decoration: none;'>{counterpoint_art['title']}</a>"
-            f"   </div>"
-            f"</div>"
-        )
+        tooltip_html = _TOOLTIP_TMPL % {
+            'title': art['title'],
+            'url': art['url'],
+            'url30': art['url'][:30],
+            'cb_color': cb_color,
+            'cb_score': cb_score,
+            'cb_label': cb_label,
+            'cp_url': counterpoint_art['url'],
+            'cp_title': counterpoint_art['title'],
+        }
         
         # --- COLOR LOGIC SWITCH ---
         node_color = None
-        if color_mode == "Sentiment":
+        if precomputed_colors and color_mode in precomputed_colors:
+            node_color = precomputed_colors[color_mode][i]
+        elif color_mode == "Sentiment":
             node_color = get_sentiment_color(art['title'] + " " + art['text'][:200])
         elif color_mode == "Politics":
             node_color = get_political_color(art['url'])
@@ -145,43 +281,74 @@ def build_network_graph(articles, sim_matrix, threshold=0.4, color_mode="Cluster
             
         G.add_node(int(i), **node_attrs)
 
-    # Pass 1: Strong Edges
-    for i in range(rows):
-        for j in range(i + 1, cols): 
-            weight = sim_matrix[i][j]
-            if weight > threshold:
-                u, v = int(i), int(j)
-                G.add_edge(u, v, value=float(weight), title=f"Similarity: {weight:.2f}", color=None)
+    # Pass 1: Strong Edges (one NumPy pass over the upper triangle, bulk insert)
+    # Only the surviving (u, v) pairs are materialized (O(edges), not O(N²) index arrays)
+    # .tolist() hands NetworkX/PyVis plain Python ints and floats
+    us, vs = np.nonzero(np.triu(sim_matrix > threshold_q, k=1))
+    weights = sim_matrix[us, vs] / scale
+    G.add_edges_from(
+        (u, v, {'value': w, 'title': f"Similarity: {w:.2f}", 'color': None})
+        for u, v, w in zip(us.tolist(), vs.tolist(), weights.tolist())
+    )
 
     # Pass 2: Weak Bridges
+    # A row only ever looks at its top few neighbours (itself + at most 2 links),
+    # so pick those for every row in one argpartition instead of sorting each row
+    k = min(BRIDGE_CANDIDATES, rows)
+    if _HAS_NUMBA and rows >= NUMBA_MIN_ROWS:
+        # Compiled single pass per row, rows in parallel
+        from src.sim_kernel import row_topk
+        cand, cand_w = row_topk(sim_matrix, k)
+        cand = cand.tolist()
+        cand_w = (cand_w / scale).tolist()
+    else:
+        if rows > k:
+            cand = np.argpartition(-sim_matrix, k - 1, axis=1)[:, :k]
+        else:
+            cand = np.tile(np.arange(rows), (rows, 1))
+        cand_w = np.take_along_axis(sim_matrix, cand, axis=1)
+        order = np.argsort(-cand_w, axis=1, kind='stable')
+        cand = np.take_along_axis(cand, order, axis=1).tolist()
+        cand_w = (np.take_along_axis(cand_w, order, axis=1) / scale).tolist()
+
+    # Bridges are collected and inserted in one add_edges_from; weak_adj tracks
+    # the ones chosen so far so later rows still see them as existing links
+    weak_edges = []
+    weak_adj = defaultdict(set)
     for i in range(rows):
-        sorted_indices = np.argsort(sim_matrix[i])[::-1]
         connections_count = 0
-        for j_numpy in sorted_indices:
-            i_clean = int(i)
-            j_clean = int(j_numpy)
-            if i_clean == j_clean: continue 
-            if G.has_edge(i_clean, j_clean):
+        existing = set(G.adj[i]) | weak_adj[i]  # one set per row instead of has_edge per candidate
+        for j, weight in zip(cand[i], cand_w[i]):
+            if i == j: continue 
+            if j in existing:
                 connections_count += 1
                 continue
             if connections_count < 2: 
-                weight = sim_matrix[i][j_numpy]
                 if weight > 0.05: 
-                    G.add_edge(i_clean, j_clean, value=0.1, title=f"Weak Link: {weight:.2f}", color='rgba(200, 200, 200, 0.1)', hidden=False)
+                    weak_edges.append((i, j, {'value': 0.1, 'title': f"Weak Link: {weight:.2f}", 'color': 'rgba(200, 200, 200, 0.1)', 'hidden': False}))
+                    weak_adj[j].add(i)
                     connections_count += 1
             else:
                 break
+    G.add_edges_from(weak_edges)
 
     # 3. Detect Communities
     if len(G.edges) > 0:
-        partition = community_louvain.best_partition(G)
-        unique_clusters = set(partition.values())
+        # Topology depends only on (matrix, threshold): colour-mode toggles reuse
+        # the partition (also keeps clusters stable between re-renders)
+        graph_key = _partition_key(sim_matrix, threshold)
+        partition = _get_partition(graph_key)
+        if partition is None:
+            partition = _store_partition(graph_key, detect_communities(G))
+
+        # Members of every cluster in one pass over the partition
+        clusters = defaultdict(list)
+        for node, grp in partition.items():
+            if isinstance(node, int):
+                clusters[grp].append(node)
 
         # --- INSERT THEME LABELS HERE ---
-        for cluster_id in unique_clusters:
-            # Get members of this cluster 
-            members = [node for node, grp in partition.items() if grp == cluster_id and isinstance(node, int)]
-            if not members: continue
+        for cluster_id, members in clusters.items():
 
             # Calculate Theme
             cluster_articles = [articles[m] for m in members]
@@ -211,33 +378,8 @@ def build_network_graph(articles, sim_matrix, threshold=0.4, color_mode="Cluster
     
     return G
 
-def save_graph_html(G, filename="galaxy.html"):
-    # 1. Disable the native dropdown menu here
-    net = Network(height="750px", width="100%", bgcolor="#0d1117", font_color="white", select_menu=False, cdn_resources='remote')
-    net.from_nx(G)
-    
-    # Physics settings
-    net.force_atlas_2based(
-        gravity=-80, 
-        central_gravity=0.01, 
-        spring_length=150,      
-        spring_strength=0.05, 
-        damping=0.4, 
-        overlap=0 
-    )
-    
-    full_path = os.path.join(os.getcwd(), filename)
-    
-    try:
-        # Write the initial HTML
-        net.write_html(full_path)
-        
-        # 2. Open the file to inject custom JavaScript AND CSS
-        with open(full_path, "r", encoding="utf-8") as f:
-            html = f.read()
-            
-        # We inject CSS for the body AND the specific #mynetwork container
-        custom_injection = """
+# We inject CSS for the body AND the specific #mynetwork container
+CUSTOM_INJECTION = """
         <style>
             /* 1. Remove page margins and set background */
             body {
@@ -263,11 +405,129 @@ def save_graph_html(G, filename="galaxy.html"):
         </script>
         </body>
         """
-        
-        # Insert our script/css before the closing body tag
-        html = html.replace("</body>", custom_injection)
-        
-        # Save the modified file
+
+FONT_COLOR = "white"
+
+def _new_network():
+    # 1. Disable the native dropdown menu here
+    from pyvis.network import Network
+    net = Network(height="750px", width="100%", bgcolor="#0d1117", font_color=FONT_COLOR, select_menu=False, cdn_resources='remote')
+    
+    # Physics settings
+    net.force_atlas_2based(
+        gravity=-80, 
+        central_gravity=0.01, 
+        spring_length=150,      
+        spring_strength=0.05, 
+        damping=0.4, 
+        overlap=0 
+    )
+    return net
+
+def _network_data(G, default_node_size=10):
+    """
+    Converts G into the vis.js node/edge dicts PyVis would produce
+    (same defaults as Network.add_node and from_nx), without going through
+    from_nx: that re-adds both endpoints for every edge and scans every
+    existing edge for duplicates (quadratic in edges).
+    """
+    nodes = []
+    for node_id, attrs in G.nodes(data=True):
+        opts = dict(attrs)
+        opts['size'] = int(opts.get('size', default_node_size))
+        label = opts.pop('label', None) or node_id
+        shape = opts.pop('shape', 'dot')
+        color = opts.pop('color', '#97c2fc')
+        if 'group' not in opts:
+            opts['color'] = color  # add_node drops the color when a group is set
+        opts.update(id=node_id, label=label, shape=shape, font={'color': FONT_COLOR})
+        nodes.append(opts)
+
+    edges = []
+    for u, v, attrs in G.edges(data=True):
+        edge_attrs = dict(attrs)
+        # from_nx maps 'weight' onto the vis.js 'width' option
+        edge_attrs['width'] = edge_attrs.pop('weight', 1)
+        edge_attrs['from'] = u
+        edge_attrs['to'] = v
+        edges.append(edge_attrs)
+    return nodes, edges
+
+def _to_script_json(data):
+    # Same output as Jinja's |tojson (sorted keys, HTML-safe escaping), so the
+    # JSON is safe inside <script> and the page matches PyVis' own render
+    return (json.dumps(data, sort_keys=True).replace("<", "\\u003c").replace(">", "\\u003e")
+            .replace("&", "\\u0026").replace("'", "\\u0027"))
+
+# PyVis' template switches on the node count (loading bar + stabilization
+# progress above 100 nodes, with physics on) and on clickable tooltips
+SHELL_LARGE_GRAPH_NODES = 100
+
+def _uses_link_tooltips(nodes):
+    # Same check as Network.generate_html
+    return any("href" in (n.get('title') or "") for n in nodes)
+
+@lru_cache(maxsize=4)
+def _graph_shell(large, tooltip_link):
+    """
+    Renders the PyVis page once per template variant with placeholder data and
+    splits it around the node/edge arrays. Every graph after that is two JSON
+    dumps + string joins, skipping PyVis' node bookkeeping and the Jinja render.
+    Returns (head, middle, tail), or None if the template layout is unexpected.
+    """
+    net = _new_network()
+    count = SHELL_LARGE_GRAPH_NODES + 1 if large else 1
+    title = "href" if tooltip_link else ""
+    net.nodes = [{'id': i, 'title': title} for i in range(count)]
+    html = net.generate_html(notebook=False).replace("</body>", CUSTOM_INJECTION)
+
+    parts = []
+    rest = html
+    for marker in ("nodes = new vis.DataSet(", "edges = new vis.DataSet("):
+        start = rest.find(marker)
+        if start < 0:
+            return None
+        start += len(marker)
+        end = rest.find(");", start)
+        parts.append(rest[:start])
+        rest = rest[end:]
+    parts.append(rest)
+    return tuple(parts)
+
+def render_graph_html(G):
+    """
+    Builds the PyVis page for G entirely in memory and returns the HTML string
+    (no write-then-read round trip through galaxy.html).
+    """
+    nodes, edges = _network_data(G)
+    shell = _graph_shell(len(nodes) > SHELL_LARGE_GRAPH_NODES, _uses_link_tooltips(nodes))
+    if shell is not None:
+        head, middle, tail = shell
+        return head + _to_script_json(nodes) + middle + _to_script_json(edges) + tail
+
+    # Unknown PyVis template: let PyVis render it
+    net = _new_network()
+    net.nodes = nodes
+    net.edges = edges
+    net.node_ids = [n['id'] for n in nodes]
+    net.node_map = {n['id']: n for n in nodes}
+    html = net.generate_html(notebook=False)
+    
+    # Insert our script/css before the closing body tag
+    return html.replace("</body>", CUSTOM_INJECTION)
+
+def build_network_graph_html(articles, sim_matrix, threshold=0.4, color_mode="Cluster", precomputed_colors=None):
+    """Builds the graph and returns the finished PyVis HTML string (nothing touches disk)."""
+    G = build_network_graph(articles, sim_matrix, threshold=threshold, color_mode=color_mode,
+                            precomputed_colors=precomputed_colors)
+    return render_graph_html(G)
+
+def save_graph_html(G, filename):
+    """Backward-compatible wrapper: writes render_graph_html() output to a file."""
+    full_path = os.path.join(os.getcwd(), filename)
+    
+    try:
+        html = render_graph_html(G)
         with open(full_path, "w", encoding="utf-8") as f:
             f.write(html)
             
@@ -275,4 +535,103 @@ def save_graph_html(G, filename="galaxy.html"):
         
     except Exception as e:
         print(f"❌ Error saving graph: {e}")
-        return None
\ No newline at end of file
+        return None
+
+# --- IN-PROCESS HTML CACHE ---
+# lru_cache needs hashable args, so the (unhashable) articles/matrix live in a
+# small registry keyed by their fingerprint and the cache is keyed on that.
+_GRAPH_INPUTS = OrderedDict()
+_GRAPH_INPUTS_LOCK = threading.Lock()
+GRAPH_INPUTS_MAX = 8
+
+def register_graph_inputs(fingerprint, articles, sim_matrix, precomputed_colors=None):
+    with _GRAPH_INPUTS_LOCK:
+        _GRAPH_INPUTS[fingerprint] = (articles, sim_matrix, precomputed_colors)
+        _GRAPH_INPUTS.move_to_end(fingerprint)
+        while len(_GRAPH_INPUTS) > GRAPH_INPUTS_MAX:
+            _GRAPH_INPUTS.popitem(last=False)
+
+def _graph_inputs(fingerprint):
+    """
+    Returns the registered (articles, sim_matrix, precomputed_colors).
+    Raises KeyError if they were never registered, or were evicted by other
+    sessions' registrations in the meantime (callers register again and retry).
+    """
+    with _GRAPH_INPUTS_LOCK:
+        inputs = _GRAPH_INPUTS.get(fingerprint)
+        if inputs is not None:
+            _GRAPH_INPUTS.move_to_end(fingerprint)
+    if inputs is None:
+        raise KeyError(f"No graph inputs registered for {fingerprint!r}")
+    return inputs
+
+# Rendered pages are also kept on disk so other sessions / restarts can reuse them
+GRAPH_DISK_CACHE_DIR = os.path.join(tempfile.gettempdir(), "apogee_graphs")
+GRAPH_DISK_CACHE_TTL = 24 * 3600  # seconds
+# Hash of this module's source: any change to node styling, the shell template or
+# CUSTOM_INJECTION gives new filenames, so a deploy never serves stale pages
+with open(__file__, "rb") as _src:
+    GRAPH_RENDER_VERSION = hashlib.blake2b(_src.read(), digest_size=4).hexdigest()
+
+def _disk_cache_path(fingerprint, threshold_milli, color_mode):
+    name = f"graph_{GRAPH_RENDER_VERSION}_{fingerprint}_{threshold_milli}_{color_mode}.html"
+    return os.path.join(GRAPH_DISK_CACHE_DIR, name)
+
+def _prune_disk_cache():
+    """Deletes expired pages (and leftovers from older render versions once they expire)."""
+    now = time.time()
+    for entry in os.scandir(GRAPH_DISK_CACHE_DIR):
+        try:
+            if now - entry.stat().st_mtime >= GRAPH_DISK_CACHE_TTL:
+                os.remove(entry.path)
+        except OSError:
+            pass  # Removed by another session in the meantime
+
+@lru_cache(maxsize=32)
+def cluster_title_groups(fingerprint, threshold_milli):
+    """
+    {article title: cluster id} for registered inputs at this threshold (the AI
+    Analyst tags its sources with it). Reuses the galaxy's cached partition;
+    only builds the graph if the page itself came from the disk cache.
+    """
+    articles, sim_matrix, _ = _graph_inputs(fingerprint)
+    threshold = threshold_milli / 1000
+    partition = _get_partition(_partition_key(_prepare_matrix(sim_matrix), threshold))
+    if partition is None:
+        G = build_network_graph(articles, sim_matrix, threshold=threshold)
+        partition = {n: G.nodes[n]['group'] for n in G.nodes if 'group' in G.nodes[n]}
+    return {articles[n]['title']: grp for n, grp in partition.items() if isinstance(n, int)}
+
+@lru_cache(maxsize=32)
+def cached_graph_html(fingerprint, threshold_milli, color_mode):
+    """
+    Returns the galaxy HTML for registered inputs; any previously seen
+    (articles, threshold, mode) combination is an O(1) lookup.
+    `threshold_milli` is the threshold * 1000 as an int (stable cache key).
+    """
+    path = _disk_cache_path(fingerprint, threshold_milli, color_mode)
+    try:
+        if time.time() - os.stat(path).st_mtime < GRAPH_DISK_CACHE_TTL:
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+    except OSError:
+        pass  # Not cached yet (or unreadable)
+
+    articles, sim_matrix, precomputed_colors = _graph_inputs(fingerprint)
+    html = build_network_graph_html(articles, sim_matrix, threshold=threshold_milli / 1000,
+                                    color_mode=color_mode, precomputed_colors=precomputed_colors)
+    try:
+        os.makedirs(GRAPH_DISK_CACHE_DIR, exist_ok=True)
+        # Write to a temp file in the same folder, then rename: readers never see half a page
+        fd, tmp_path = tempfile.mkstemp(dir=GRAPH_DISK_CACHE_DIR, suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        _prune_disk_cache()
+    except OSError as e:
+        print(f"⚠️ Could not cache graph HTML: {e}")
+    return html
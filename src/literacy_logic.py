@@ -1,8 +1,23 @@
 import google.generativeai as genai
 import os
+import json
+import re
+import time
 import dotenv
+from collections import OrderedDict
 import newspaper
+import requests
+from requests.adapters import HTTPAdapter
 from newspaper import Config
+from src.disk_cache import cache_get, cache_put, ARTICLE_CACHE_TTL
+
+# Optional: trafilatura extracts title + main text in one lxml pass, without
+# newspaper's NLP pipeline (newspaper stays as the fallback parser)
+try:
+    import trafilatura
+    _HAS_TRAFILATURA = True
+except ImportError:
+    _HAS_TRAFILATURA = False
 
 # Load environment variables
 dotenv.load_dotenv()
@@ -14,29 +29,99 @@ genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 # Changed 'gemini-pro' to 'gemini-1.5-flash'
 model = genai.GenerativeModel('gemini-3-flash-preview')
 
+# Shared scraper setup: one Config and one keep-alive session for every URL
+# User-Agent to prevent 403 Forbidden errors
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+_CONFIG = Config()
+_CONFIG.browser_user_agent = USER_AGENT
+_CONFIG.request_timeout = 10
+
+_SESSION = requests.Session()
+_SESSION.headers['User-Agent'] = USER_AGENT
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+_SESSION.mount("http://", _adapter)
+_SESSION.mount("https://", _adapter)
+
+# --- PROMPT BUDGET ---
+# ~1500 tokens of article text (the old 6000-char cap), estimated locally at
+# ~4 characters per token instead of a count_tokens round-trip
+MAX_ARTICLE_TOKENS = 1500
+
+def _truncate_for_prompt(text, max_tokens=MAX_ARTICLE_TOKENS):
+    """Trims text to the token budget, cutting at the last paragraph (or sentence) break."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    # Only snap back to a break in the last quarter, so we never drop most of the budget
+    floor = max_chars * 3 // 4
+    cut = text.rfind("\n\n", floor, max_chars)
+    if cut == -1:
+        cut = text.rfind(". ", floor, max_chars) + 1 or max_chars
+    return text[:cut].rstrip()
+
+# url -> (timestamp, (title, text)); failed scrapes are not cached
+ARTICLE_TEXT_TTL = 3600
+ARTICLE_TEXT_CACHE_SIZE = 256
+_article_text_cache = OrderedDict()
+
 def get_article_text(url):
     """
     Scrapes the text from a given URL using the same anti-blocking config
-    as the main pipeline.
+    as the main pipeline. Results are kept in memory for an hour and on disk
+    for a day, so re-analyzing the same URL skips the download.
     """
+    hit = _article_text_cache.get(url)
+    if hit and time.time() - hit[0] < ARTICLE_TEXT_TTL:
+        _article_text_cache.move_to_end(url)
+        return hit[1]
+
+    result = _load_cached_article_text(url)
+    if result is None:
+        result = _scrape_article_text(url)
+        if result[0]:
+            cache_put("literacy", url, list(result))
+    if result[0]:
+        _article_text_cache[url] = (time.time(), result)
+        if len(_article_text_cache) > ARTICLE_TEXT_CACHE_SIZE:
+            _article_text_cache.popitem(last=False)
+    return result
+
+def _load_cached_article_text(url):
+    # Disk layer (./.http_cache, 24h): our own earlier scrapes first, then pages
+    # the galaxy pipeline already downloaded and parsed
+    cached = cache_get("literacy", url, ARTICLE_CACHE_TTL)
+    if cached:
+        return tuple(cached)
+    art = cache_get("article", url, ARTICLE_CACHE_TTL)
+    if art and art.get("title") and art.get("text"):
+        return art["title"], art["text"]
+    return None
+
+def _scrape_article_text(url):
     try:
-        # User-Agent to prevent 403 Forbidden errors
-        user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        config = Config()
-        config.browser_user_agent = user_agent
-        config.request_timeout = 10
-
-        article = newspaper.Article(url, config=config)
-        article.download()
+        resp = _SESSION.get(url, timeout=_CONFIG.request_timeout)
+        resp.raise_for_status()
+
+        if _HAS_TRAFILATURA:
+            extracted = trafilatura.extract(resp.text, url=url, include_comments=False,
+                                            output_format="json", with_metadata=True)
+            if extracted:
+                doc = json.loads(extracted)
+                if doc.get("title") and doc.get("text"):
+                    return doc["title"], doc["text"]
+
+        article = newspaper.Article(url, config=_CONFIG)
+        article.download(input_html=resp.text)
         article.parse()
         
         return article.title, article.text
     except Exception as e:
         return None, f"Error scraping URL: {str(e)}"
 
-def neutralize_content(content, is_url=False):
+def neutralize_content(content, is_url=False, scraped=None):
     """
     Rewrites text (or scraped URL content) to be purely factual.
+    `scraped` can carry an already-fetched (title, text) for the URL.
     """
     
     # 1. If it's a URL, scrape it first
@@ -44,7 +129,7 @@ def neutralize_content(content, is_url=False):
     text_to_process = content
 
     if is_url:
-        title, scraped_text = get_article_text(content)
+        title, scraped_text = scraped or get_article_text(content)
         if not title: # Error happened
             return "Error", scraped_text # scraped_text contains error msg here
         original_title = title
@@ -54,8 +139,8 @@ def neutralize_content(content, is_url=False):
         return original_title, "Error: The text was too short to analyze."
 
     # 2. Send to Gemini
-    # We limit to 6000 chars to prevent hitting token limits on the free tier
-    truncated_text = text_to_process[:6000]
+    # We limit the size to prevent hitting token limits on the free tier
+    truncated_text = _truncate_for_prompt(text_to_process)
     
     prompt = f"""
     Act as an objective, robot journalist. 
@@ -80,16 +165,17 @@ def neutralize_content(content, is_url=False):
         return original_title, text_to_process, response.text
     except Exception as e:
         return original_title, text_to_process, f"AI Error: {str(e)}"
-def classify_political_leaning(content, is_url=False):
+def classify_political_leaning(content, is_url=False, scraped=None):
     """
     Uses Gemini to classify political framing as Left, Right, or Neutral.
+    `scraped` can carry an already-fetched (title, text) for the URL.
     Returns: (label, confidence, explanation)
     """
 
     # Reuse your scraping logic if it's a URL
     text_to_analyze = content
     if is_url:
-        title, scraped_text = get_article_text(content)
+        title, scraped_text = scraped or get_article_text(content)
         if not title:
             return "Error", "N/A", scraped_text
         text_to_analyze = scraped_text
@@ -97,7 +183,7 @@ def classify_political_leaning(content, is_url=False):
     if not text_to_analyze or len(text_to_analyze) < 50:
         return "Error", "N/A", "Text too short to analyze."
 
-    truncated_text = text_to_analyze[:6000]
+    truncated_text = _truncate_for_prompt(text_to_analyze)
 
     prompt = f"""
     You are a media analysis system.
@@ -178,16 +264,9 @@ def classify_political_leaning(content, is_url=False):
     except Exception as e:
         return "Error", "N/A", str(e)
     
+# One pass over the model output; the longer "Source Quality ..." labels come
+# first so "Explanation:" doesn't split "Source Quality Explanation:"
+_LABEL_RE = re.compile(r'(Source Quality Explanation:|Source Quality Grade:|Political Framing:|Confidence:|Explanation:)')
+
 def format_analysis(text):
-    fields = [
-        "Political Framing:",
-        "Confidence:",
-        "Explanation:",
-        "Source Quality Grade:",
-        "Source Quality Explanation:"
-    ]
-
-    for field in fields:
-        text = text.replace(field, f"\n{field}")
-
-    return text.strip()
\ No newline at end of file
+    return _LABEL_RE.sub(r'\n\1', text).strip()
@@ -1,6 +1,7 @@
 import pandas as pd
 import pydeck as pdk
-import random
+import re
+import numpy as np
 
 # --- HACKATHON GEOCODER ---
 LOCATION_MAP = {
@@ -24,6 +25,16 @@ LOCATION_MAP = {
     "Silicon Valley": [-122.05, 37.38],
 }
 
+# One compiled alternation instead of a substring scan per location.
+# Longest names first so "New York" wins over shorter overlaps; the lookarounds
+# act as word boundaries that also work for names ending in "." (U.S.)
+_LOC_KEYS = sorted(LOCATION_MAP, key=len, reverse=True)
+_LOC_RE = re.compile(r'(?<!\w)(' + '|'.join(map(re.escape, _LOC_KEYS)) + r')(?!\w)', re.IGNORECASE)
+_LOC_BY_LOWER = {k.lower(): k for k in LOCATION_MAP}
+# When several places are mentioned, the one listed first in LOCATION_MAP wins
+# (same pick as the original per-location scan, not the first one in the text)
+_LOC_PRIORITY = {k: i for i, k in enumerate(LOCATION_MAP)}
+
 def get_map_data(articles):
     """
     Scans article text for location keywords and assigns coordinates.
@@ -33,22 +44,18 @@ def get_map_data(articles):
 
     for art in articles:
         # SCANNING MORE TEXT NOW (1000 chars) to catch locations mentioned later
-        text_content = (art['title'] + " " + art['text'][:1000]).lower()
+        text_content = art['title'] + " " + art['text'][:1000]
         
         lat, lon = None, None
         found_loc = "Unknown"
 
-        for loc_name, coords in LOCATION_MAP.items():
-            if loc_name.lower() in text_content:
-                lon, lat = coords
-                found_loc = loc_name
-                break 
+        # Every location mentioned, in one pass; keep the highest-priority one
+        found = {_LOC_BY_LOWER[m.group(1).lower()] for m in _LOC_RE.finditer(text_content)}
+        if found:
+            found_loc = min(found, key=_LOC_PRIORITY.__getitem__)
+            lon, lat = LOCATION_MAP[found_loc]
         
         if lat and lon:
-            # Jitter to prevent stacking
-            lat += random.uniform(-0.5, 0.5)
-            lon += random.uniform(-0.5, 0.5)
-            
             map_data.append({
                 "title": art['title'],
                 "url": art['url'],
@@ -57,7 +64,13 @@ def get_map_data(articles):
                 "location": found_loc
             })
             
-    return pd.DataFrame(map_data)
+    df = pd.DataFrame(map_data)
+    if not df.empty:
+        # Jitter to prevent stacking (one RNG fill for every point)
+        jitter = np.random.default_rng().uniform(-0.5, 0.5, size=(len(df), 2))
+        df['lat'] += jitter[:, 0]
+        df['lon'] += jitter[:, 1]
+    return df
 
 def generate_3d_map(df):
     """
@@ -1,21 +1,95 @@
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import os
 import numpy as np
 import streamlit as st
+from importlib.util import find_spec
+from src.embed_cache import get_or_compute
 
-# 1. Load the Model (Global Variable)
-# We do this outside the function so we don't reload it every time (Speed Boost)
-print("🧠 Loading AI Model... (This happens once)")
+# Optional: SimSIMD has hand-tuned cosine kernels (AVX-512 / NEON)
+try:
+    import simsimd
+    _HAS_SIMSIMD = True
+except ImportError:
+    _HAS_SIMSIMD = False
 
+MODEL_ID = 'all-MiniLM-L6-v2'
+
+# Optional, opt-in: int8-quantized ONNX Runtime build of MiniLM for CPU-only hosts
+# (fused kernels, a quarter of the weight bandwidth). EMBED_BACKEND=onnx turns it on
+# when optimum + onnxruntime are installed; the default PyTorch model keeps the
+# CUDA / half-precision path on GPU hosts.
+ONNX_MODEL_FILE = "onnx/model_qint8_avx2.onnx"
+USE_ONNX = (os.getenv("EMBED_BACKEND", "torch") == "onnx"
+            and find_spec("optimum") is not None and find_spec("onnxruntime") is not None)
+# Below this many articles the plain BLAS path is already instant
+SIMSIMD_MIN_ARTICLES = 50
+
+# 1. Load the Model (one shared copy per process)
+# cache_resource keeps it across reruns and sessions instead of reloading (Speed Boost)
 @st.cache_resource
-def load_model():
-    return SentenceTransformer('all-MiniLM-L6-v2')
+def get_embedder():
+    from sentence_transformers import SentenceTransformer
+    if USE_ONNX:
+        try:
+            print("🧠 Loading AI Model (ONNX int8, CPU)... (This happens once)")
+            return SentenceTransformer(MODEL_ID, backend="onnx", model_kwargs={"file_name": ONNX_MODEL_FILE})
+        except Exception as e:
+            # e.g. CPU without AVX2 or no network for the ONNX file
+            # (embed_cache_id then switches to the PyTorch cache entries)
+            print(f"⚠️ ONNX model unavailable, using PyTorch: {e}")
+
+    import torch
+    # Keep MiniLM on the GPU when there is one (article + query encodes run there)
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    print(f"🧠 Loading AI Model on {device}... (This happens once)")
+    model = SentenceTransformer(MODEL_ID, device=device)
+    if device == "cuda":
+        # Half precision doubles tensor-core throughput; outputs are still cast to float32
+        model.half()
+    return model
+
+def embed_cache_id(model=None):
+    """
+    Embedding-cache key for the backend that actually loaded: int8 ONNX vectors
+    are cached apart from the fp32 PyTorch ones, and the ":norm" suffix keeps
+    unit-length vectors apart from entries cached before embed_batch normalized them.
+    Only loads the model when ONNX is enabled (it may still fall back to PyTorch).
+    """
+    if model is None:
+        if not USE_ONNX:
+            return f"{MODEL_ID}:norm"
+        model = get_embedder()
+    if getattr(model, "backend", "torch") == "onnx":
+        return f"{MODEL_ID}:qint8:norm"
+    return f"{MODEL_ID}:norm"
 
-def vectorize_articles(articles):
-    model = load_model()
+def embed_batch(texts, batch_size=64, model=None):
+    """
+    Embeds all texts in a few large batches (one model call per chunk)
+    instead of paying the per-call overhead for every article.
+    Vectors come back unit-length, so cosine similarity is a plain dot product.
+    """
+    model = model or get_embedder()
+    return model.encode(texts, batch_size=batch_size, convert_to_numpy=True,
+                        normalize_embeddings=True, show_progress_bar=False)
+
+def _article_text(art):
+    # We combine Title + Text for better context
+    return f"{art['title']}: {art['text'][:500]}"
+
+def warm_embedding_cache(articles):
+    """
+    Embeds a partial batch of articles into the cache ahead of time
+    (used while the rest of the articles are still downloading).
+    """
+    if articles:
+        get_or_compute([_article_text(art) for art in articles], embed_batch, embed_cache_id())
+
+def vectorize_articles(articles, model=None):
     """
     Input: List of dictionaries (from your scraper)
-    Output: The same list, but now with a 'vector' key added to each article.
+    Output: (articles, vectors) where row i of the contiguous float32 `vectors`
+    matrix belongs to articles[i] (the dicts themselves are not modified).
+    `model` optionally injects an embedder (defaults to the shared get_embedder()).
     """
     if not articles:
         return []
@@ -23,17 +97,22 @@ def vectorize_articles(articles):
     print(f"🧮 Vectorizing {len(articles)} articles...")
     
     # Extract just the text for the AI to read
-    # We combine Title + Text for better context
-    texts = [f"{art['title']}: {art['text'][:500]}" for art in articles]
+    texts = [_article_text(art) for art in articles]
     
     # THE MAGIC LINE: Turns text into numbers
-    vectors = model.encode(texts)
-    
-    # Store the vector back into the article dictionary
-    for i, article in enumerate(articles):
-        article['vector'] = vectors[i]
+    # (cached by content hash, so only new articles hit the model)
+    vectors = get_or_compute(texts, lambda batch: embed_batch(batch, model=model), embed_cache_id(model))
         
-    return articles, vectors
+    return articles, np.ascontiguousarray(vectors, dtype=np.float32)
+
+def normalize_vectors(vectors):
+    """
+    L2-normalizes each row once (float32, contiguous) so cosine similarity
+    becomes a plain dot product.
+    """
+    V = np.ascontiguousarray(vectors, dtype=np.float32).copy()
+    V /= np.linalg.norm(V, axis=1, keepdims=True) + 1e-12
+    return V
 
 def calculate_similarity(vectors):
     """
@@ -42,9 +121,16 @@ def calculate_similarity(vectors):
     """
     # Cosine Similarity is the standard for text comparison
     # Result is a number between 0 (Opposite) and 1 (Identical)
-    sim_matrix = cosine_similarity(vectors)
+    # On unit vectors this is a single BLAS matmul (no Python loops)
+    V = normalize_vectors(vectors)
+    n = V.shape[0]
+    if _HAS_SIMSIMD and n > SIMSIMD_MIN_ARTICLES:
+        # SimSIMD returns cosine *distance*
+        sim_matrix = 1.0 - np.asarray(simsimd.cdist(V, V, metric="cos"), dtype=np.float32).reshape(n, n)
+    else:
+        sim_matrix = V @ V.T
     
     # Zero out the diagonal (An article is always 100% similar to itself, which is boring)
     np.fill_diagonal(sim_matrix, 0)
     
-    return sim_matrix
\ No newline at end of file
+    return sim_matrix
@@ -0,0 +1,30 @@
+"""
+Per-domain politeness for the concurrent scraper.
+DomainRateLimiter spaces out request *starts* to the same host, so a batch that
+spans many sites still runs fully in parallel while no single site sees a burst
+(which is what gets us 403/429'd).
+"""
+import time
+import asyncio
+from urllib.parse import urlparse
+
+
+class DomainRateLimiter:
+    def __init__(self, min_interval=0.05):
+        """
+        Parameters:
+        - min_interval (float): Minimum seconds between two request starts on one host
+        """
+        self.min_interval = min_interval
+        self._next_slot = {}  # host -> earliest monotonic time the next request may start
+
+    async def wait(self, url):
+        """Sleeps until this URL's host has a free slot."""
+        host = urlparse(url).netloc
+        now = time.monotonic()
+        # Reserve a slot before awaiting (no await between read and write, so
+        # concurrent tasks on the same loop each get their own slot)
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
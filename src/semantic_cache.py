@@ -0,0 +1,72 @@
+"""
+Semantic response cache for News Constellation.
+Near-duplicate questions (cosine >= threshold) reuse a stored answer instead of
+paying for another embed + Gemini round-trip. Candidates are found with
+random-projection LSH: each query vector is hashed to a bucket of sign bits.
+"""
+import time
+import threading
+from collections import defaultdict
+import numpy as np
+
+
+class SemanticCache:
+    def __init__(self, n_bits=16, threshold=0.95, ttl=3600, max_per_bucket=32, seed=42):
+        """
+        Parameters:
+        - n_bits (int): Number of random hyperplanes (bucket key size)
+        - threshold (float): Minimum cosine similarity for a hit
+        - ttl (int): Seconds an answer stays valid
+        - max_per_bucket (int): Oldest entries are dropped beyond this
+        """
+        self.n_bits = n_bits
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_per_bucket = max_per_bucket
+        self._seed = seed
+        self._planes = None  # Created on first use, once the vector size is known
+        self._buckets = defaultdict(list)  # bucket -> [(scope, unit_vec, response, timestamp)]
+        self._lock = threading.Lock()
+
+    def _unit(self, vector):
+        v = np.asarray(vector, dtype=np.float32)
+        return v / (np.linalg.norm(v) + 1e-12)
+
+    def _bucket(self, unit_vec):
+        if self._planes is None:
+            rng = np.random.default_rng(self._seed)
+            self._planes = rng.standard_normal((unit_vec.shape[0], self.n_bits)).astype(np.float32)
+        bits = (unit_vec @ self._planes) > 0
+        return int(np.dot(bits, 1 << np.arange(self.n_bits)))
+
+    def lookup(self, vector, scope, threshold=None):
+        """
+        Returns the cached response for the most similar earlier query in `scope`
+        (e.g. the current article set), or None if nothing is close enough.
+        Checks the query's bucket plus its 1-bit-flip neighbours.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        q = self._unit(vector)
+        now = time.time()
+        best_sim, best_response = -1.0, None
+
+        with self._lock:
+            key = self._bucket(q)
+            for bucket in [key] + [key ^ (1 << i) for i in range(self.n_bits)]:
+                for entry_scope, v, response, ts in self._buckets.get(bucket, ()):
+                    if entry_scope != scope or now - ts > self.ttl:
+                        continue
+                    sim = float(v @ q)
+                    if sim > best_sim:
+                        best_sim, best_response = sim, response
+
+        return best_response if best_sim >= threshold else None
+
+    def insert(self, vector, scope, response):
+        q = self._unit(vector)
+        now = time.time()
+        with self._lock:
+            key = self._bucket(q)
+            entries = [e for e in self._buckets[key] if now - e[3] <= self.ttl]
+            entries.append((scope, q, response, now))
+            self._buckets[key] = entries[-self.max_per_bucket:]
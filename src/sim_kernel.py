@@ -0,0 +1,46 @@
+"""
+Compiled similarity kernels.
+- row_topk: per-row top-k of a similarity matrix (galaxy weak-bridge candidates).
+Only used when numba is installed; callers fall back to the NumPy path otherwise.
+"""
+import numpy as np
+
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _row_topk(S, k):
+        n, m = S.shape
+        idx = np.empty((n, k), dtype=np.int64)
+        val = np.empty((n, k), dtype=np.float32)
+        for i in prange(n):
+            bi = np.full(k, -1, dtype=np.int64)
+            bv = np.full(k, -np.inf, dtype=np.float32)
+            for j in range(m):
+                s = S[i, j]
+                if s <= bv[k - 1]:
+                    continue
+                pos = k - 1
+                while pos > 0 and bv[pos - 1] < s:
+                    bv[pos] = bv[pos - 1]
+                    bi[pos] = bi[pos - 1]
+                    pos -= 1
+                bv[pos] = s
+                bi[pos] = j
+            idx[i] = bi
+            val[i] = bv
+        return idx, val
+
+
+def row_topk(S, k):
+    """
+    Returns (indices, values), both (N x k), with each row's k largest entries
+    highest first (ties keep the lower column index first). k must be <= S.shape[1].
+    """
+    return _row_topk(np.ascontiguousarray(S, dtype=np.float32), k)
+
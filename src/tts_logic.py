@@ -1,12 +1,40 @@
+import io
 import os
+from typing import Iterator
+from functools import lru_cache
+import httpx
+from dotenv import load_dotenv
 from elevenlabs import ElevenLabs
 
-def elevenlabs_tts_bytes(
+_DOTENV_LOADED = False
+
+def _ensure_env():
+    # Load .env lazily, the first time TTS is actually used
+    global _DOTENV_LOADED
+    if not _DOTENV_LOADED:
+        load_dotenv()
+        _DOTENV_LOADED = True
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> ElevenLabs:
+    # One client per key: its pooled keep-alive connection skips a TLS handshake per request.
+    # This is an httpx.Client rather than a requests.Session because the ElevenLabs SDK
+    # sends everything through httpx and only accepts an httpx client (httpx_client=...)
+    http_client = httpx.Client(
+        transport=httpx.HTTPTransport(retries=2),
+        limits=httpx.Limits(max_connections=8, max_keepalive_connections=4),
+        timeout=60,
+    )
+    return ElevenLabs(api_key=api_key, httpx_client=http_client)
+
+def elevenlabs_tts_stream(
     text: str,
     voice_id: str = "JBFqnCBsd6RMkjVDRZzb",
     model_id: str = "eleven_multilingual_v2",
     output_format: str = "mp3_44100_128",
-) -> bytes:
+) -> Iterator[bytes]:
+    """Yields MP3 chunks as ElevenLabs sends them (nothing is buffered here)."""
+    _ensure_env()
     api_key = os.getenv("ELEVENLABS_API_KEY")
     if not api_key:
         raise RuntimeError("Missing ELEVENLABS_API_KEY")
@@ -18,7 +46,7 @@ def elevenlabs_tts_bytes(
     if len(text) > 1200:
         text = text[:1200] + "..."
 
-    client = ElevenLabs(api_key=api_key)
+    client = _get_client(api_key)
 
     audio_stream = client.text_to_speech.convert(
         voice_id=voice_id,
@@ -27,4 +55,16 @@ def elevenlabs_tts_bytes(
         output_format=output_format,
     )
 
-    return b"".join(audio_stream)
+    yield from audio_stream
+
+def elevenlabs_tts_bytes(
+    text: str,
+    voice_id: str = "JBFqnCBsd6RMkjVDRZzb",
+    model_id: str = "eleven_multilingual_v2",
+    output_format: str = "mp3_44100_128",
+) -> bytes:
+    # For callers that need the whole clip as one blob
+    buf = io.BytesIO()
+    for chunk in elevenlabs_tts_stream(text, voice_id, model_id, output_format):
+        buf.write(chunk)
+    return buf.getvalue()
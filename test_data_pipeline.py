@@ -0,0 +1,20 @@
+from src.data_pipeline import _canonical_url, _dedupe_urls
+
+
+def test_canonical_url_ignores_host_case_fragment_and_trailing_slash():
+    assert _canonical_url("https://Example.com/news/story/#top") == "https://example.com/news/story"
+    assert _canonical_url("https://example.com") == "https://example.com/"
+
+
+def test_canonical_url_keeps_query():
+    assert _canonical_url("https://example.com/a?id=1") != _canonical_url("https://example.com/a?id=2")
+
+
+def test_dedupe_keeps_first_original_url():
+    urls = [
+        "https://example.com/story/",
+        "https://EXAMPLE.com/story#comments",
+        "https://example.com/other",
+        "https://example.com/story",
+    ]
+    assert _dedupe_urls(urls) == ["https://example.com/story/", "https://example.com/other"]
@@ -0,0 +1,83 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.graph_logic import build_network_graph, calculate_clickbait_score
+
+
+def _articles(n):
+    return [{'title': f"Story {i}", 'text': "Body text " * 30, 'url': f"https://example.com/{i}",
+             'source': "Example", 'image': None} for i in range(n)]
+
+
+def _similarity(n, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    vecs = rng.normal(size=(n, dim)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    sim = vecs @ vecs.T
+    np.fill_diagonal(sim, 0)
+    return sim
+
+
+def _baseline_edges(sim, threshold):
+    # The original two-pass edge loop build_network_graph replaced
+    G = nx.Graph()
+    n = len(sim)
+    G.add_nodes_from(range(n))
+    strong = set()
+    for i in range(n):
+        for j in range(i + 1, n):
+            if sim[i][j] > threshold:
+                G.add_edge(i, j)
+                strong.add(frozenset((i, j)))
+    weak = set()
+    for i in range(n):
+        count = 0
+        for j in np.argsort(sim[i])[::-1]:
+            if j == i:
+                continue
+            if G.has_edge(i, j):
+                count += 1
+                continue
+            if count < 2:
+                if sim[i][j] > 0.05:
+                    G.add_edge(i, j)
+                    weak.add(frozenset((i, int(j))))
+                    count += 1
+            if count >= 2:
+                break
+    return strong, weak
+
+
+def _built_edges(G, n):
+    strong, weak = set(), set()
+    for u, v, attrs in G.edges(data=True):
+        if not (isinstance(u, int) and isinstance(v, int) and u < n and v < n):
+            continue  # cluster label edges
+        title = attrs.get('title', '')
+        if title.startswith("Similarity"):
+            strong.add(frozenset((u, v)))
+        elif title.startswith("Weak Link"):
+            weak.add(frozenset((u, v)))
+    return strong, weak
+
+
+@pytest.mark.parametrize("threshold", [0.2, 0.4])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_edges_match_baseline_loop(threshold, seed):
+    n = 40
+    sim = _similarity(n, seed=seed)
+    G = build_network_graph(_articles(n), sim.copy(), threshold=threshold, color_mode="Source")
+    assert _built_edges(G, n) == _baseline_edges(sim, threshold)
+
+
+@pytest.mark.parametrize("headline, expected", [
+    ("", 0),
+    ("Council approves new budget", 0),
+    ("SHOCKING vote in council", 55),
+    ("Is this the best phone?", 35),
+    ("You Won't Believe It!", 40),
+    ("PANIC!!! MARKETS CRASH?", 80),
+])
+def test_clickbait_score(headline, expected):
+    assert calculate_clickbait_score(headline) == expected
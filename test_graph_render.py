@@ -0,0 +1,47 @@
+import networkx as nx
+import pytest
+
+from src.graph_logic import CUSTOM_INJECTION, _network_data, _new_network, render_graph_html
+
+
+def _article_graph(n_nodes):
+    # Same node/edge attributes build_network_graph sets on a galaxy
+    G = nx.Graph()
+    for i in range(n_nodes):
+        G.add_node(i, label=" ", title=f"<a href='https://example.com/{i}'>Story {i}</a>",
+                   group=i % 3, size=20, shape="dot", image="https://example.com/i.png")
+    G.add_node("cluster_0", label="Ai\nChips", shape="text", size=30, color="white")
+    for i in range(1, n_nodes):
+        G.add_edge(i - 1, i, weight=2, color="rgba(255,255,255,0.2)")
+    return G
+
+
+def _pyvis_html(G):
+    net = _new_network()
+    net.from_nx(G)
+    return net.generate_html(notebook=False).replace("</body>", CUSTOM_INJECTION)
+
+
+@pytest.mark.parametrize("n_nodes", [5, 150])
+def test_fast_path_matches_pyvis(n_nodes):
+    G = _article_graph(n_nodes)
+    assert render_graph_html(G) == _pyvis_html(G)
+
+
+def test_fast_path_matches_pyvis_without_link_tooltips():
+    G = nx.Graph()
+    G.add_node(0, title="plain", size=10)
+    G.add_node(1, title="text", size=10)
+    G.add_edge(0, 1, weight=1)
+    assert render_graph_html(G) == _pyvis_html(G)
+
+
+def test_network_data_matches_from_nx():
+    G = _article_graph(20)
+    G.add_node("bare")
+    nodes, edges = _network_data(G)  # before from_nx, which rewrites edge attrs in place
+    net = _new_network()
+    net.from_nx(G)
+    key = lambda e: (str(e['from']), str(e['to']))
+    assert sorted(nodes, key=lambda n: str(n['id'])) == sorted(net.nodes, key=lambda n: str(n['id']))
+    assert sorted(edges, key=key) == sorted(net.edges, key=key)
@@ -0,0 +1,18 @@
+from src.literacy_logic import format_analysis
+
+
+def test_format_analysis_puts_each_label_on_its_own_line():
+    raw = ("Political Framing: Center Confidence: High Explanation: Balanced sourcing. "
+           "Source Quality Grade: A Source Quality Explanation: Cites primary documents.")
+    assert format_analysis(raw).split("\n") == [
+        "Political Framing: Center ",
+        "Confidence: High ",
+        "Explanation: Balanced sourcing. ",
+        "Source Quality Grade: A ",
+        "Source Quality Explanation: Cites primary documents.",
+    ]
+
+
+def test_format_analysis_keeps_source_quality_explanation_intact():
+    out = format_analysis("Source Quality Explanation: Wire copy.")
+    assert out == "Source Quality Explanation: Wire copy."